@@ -0,0 +1,202 @@
+import os
+import sys
+import re
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Bulk knowledge base import for large problem banks (10k+ problems with
+# editorials). Records are streamed from JSON arrays or JSONL files, converted
+# with the same rules as load_data, embedded in fixed-size batches across a
+# process pool and written to Chroma by a writer thread while the next batches
+# are still embedding. Memory stays bounded by the number of batches in flight
+# and waiting to be written.
+#
+#   python bulk_ingest.py data/problem_bank.jsonl --workers 4 --batch-size 128
+#
+# database_manager is only imported in the parent: pool workers are spawned and
+# must not open the Chroma client, they only load the embedding model.
+
+READ_CHUNK = 1 << 20
+_SEPARATORS = re.compile(r"[\s,]*")
+
+_worker_ef = None
+
+
+def iter_records(path: str):
+    """Yields records one at a time from a JSONL file or a top-level JSON array."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = f.read(READ_CHUNK).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path}: expected a JSON array")
+        pos = 1
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if buffer.startswith("]", pos):
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # record spans the chunk boundary
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    raise
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield record
+
+
+def _init_worker(threads: int):
+    """
+    Loads the default embedding model (all-MiniLM-L6-v2) once per worker, with
+    ONNX Runtime capped at `threads` threads so workers don't oversubscribe the
+    cores. ONNX Runtime sizes its thread pools from SessionOptions only, so the
+    session is built here rather than by chromadb with default options.
+    """
+    global _worker_ef
+    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+    ef = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+    ef._download_model_if_not_exists()
+    options = ef.ort.SessionOptions()
+    options.log_severity_level = 3
+    options.graph_optimization_level = ef.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = threads
+    # `model` is a cached_property; filling it in keeps chromadb from building its own session.
+    ef.__dict__["model"] = ef.ort.InferenceSession(
+        os.path.join(ef.DOWNLOAD_PATH, ef.EXTRACTED_FOLDER_NAME, "model.onnx"),
+        providers=["CPUExecutionProvider"],
+        sess_options=options,
+    )
+    _worker_ef = ef
+
+
+def _embed_batch(texts: list) -> list:
+    return [[float(x) for x in vector] for vector in _worker_ef(texts)]
+
+
+def _batches(path: str, batch_size: int, previous: dict, hashes: dict, stats: dict):
+    """Converts records to documents, skipping those whose content hash is unchanged."""
+    import database_manager as dm
+
+    source = dm.source_name(path)
+    batch = []
+    for item in iter_records(path):
+        stats["records"] += 1
+        doc = dm._to_document(item)
+        if doc is None:
+            continue
+        doc_id, text_content, meta = doc
+        meta['source'] = source
+        content_hash = dm._content_hash(text_content, json.dumps(meta, sort_keys=True))
+        meta['content_hash'] = content_hash
+        hashes[doc_id] = content_hash
+        if previous.get(doc_id) == content_hash:
+            stats["unchanged"] += 1
+            continue
+        batch.append((doc_id, text_content, meta))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(path: str, batch_size: int = 128, workers: int = None, threads: int = 1, force: bool = False) -> dict:
+    """
+    Streams `path` into the knowledge base collection. Unchanged documents (per
+    the ingest manifest shared with load_data) are skipped unless `force`;
+    documents no longer in the file are deleted. Returns throughput counters.
+    """
+    import database_manager as dm
+
+    workers = workers or max(1, (os.cpu_count() or 2) // threads)
+    source = dm.source_name(path)
+    manifest = dm._read_manifest()
+    previous = {} if force else manifest.get(source, {})
+    hashes = {}
+    stats = {"records": 0, "embedded": 0, "unchanged": 0, "deleted": 0}
+    started = time.monotonic()
+
+    def write(batch, future):
+        dm.get_collection().upsert(
+            ids=[doc_id for doc_id, _, _ in batch],
+            documents=[text for _, text, _ in batch],
+            metadatas=[meta for _, _, meta in batch],
+            embeddings=future.result(),
+        )
+        dm._index_upserted([doc_id for doc_id, _, _ in batch], [text for _, text, _ in batch], [meta for _, _, meta in batch])
+        stats["embedded"] += len(batch)
+        elapsed = time.monotonic() - started
+        print(f"  {stats['records']} records read, {stats['embedded']} embedded "
+              f"({stats['embedded'] / elapsed:.1f} docs/s)", flush=True)
+
+    print(f"Ingesting {path} with {workers} worker(s) x {threads} thread(s), batch size {batch_size}...")
+    in_flight = []  # (batch, embed future), bounded to keep memory flat
+    max_in_flight = workers * 2
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+    with pool, ThreadPoolExecutor(max_workers=1) as writer:
+        pending_writes = []
+        for batch in _batches(path, batch_size, previous, hashes, stats):
+            in_flight.append((batch, pool.submit(_embed_batch, [text for _, text, _ in batch])))
+            if len(in_flight) >= max_in_flight:
+                done_batch, future = in_flight.pop(0)
+                future.result()  # wait for the oldest batch before reading further
+                pending_writes.append(writer.submit(write, done_batch, future))
+                # Embedded batches waiting for the (single, FIFO) writer hold their vectors
+                # in memory too; if Chroma falls behind, stop reading until it catches up.
+                while len(pending_writes) > max_in_flight:
+                    pending_writes.pop(0).result()
+        for batch, future in in_flight:
+            pending_writes.append(writer.submit(write, batch, future))
+        for pending in pending_writes:
+            pending.result()
+
+    removed = [doc_id for doc_id in manifest.get(source, {}) if doc_id not in hashes]
+    if removed:
+        dm.get_collection().delete(ids=removed)
+        dm._index_deleted(removed)
+        stats["deleted"] = len(removed)
+
+    manifest[source] = hashes
+    dm._write_manifest(manifest)
+    if stats["embedded"] or removed:
+        dm.invalidate_query_cache()
+        dm.build_context_index()
+
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    stats["docs_per_second"] = round(stats["embedded"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    print(f"Done {path}: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import JSON/JSONL knowledge files into ChromaDB.")
+    parser.add_argument("paths", nargs="+", help="JSON array or JSONL files (misconception or problem records)")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "128")))
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="ONNX threads per worker")
+    parser.add_argument("--force", action="store_true", help="re-embed documents even if unchanged")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"Error: {path} not found.")
+            sys.exit(1)
+        ingest(path, batch_size=args.batch_size, workers=args.workers, threads=args.threads, force=args.force)
@@ -0,0 +1,90 @@
+import math
+import hashlib
+from collections import Counter
+from itertools import zip_longest
+
+# Output checker for large test cases. Both sides are binary streams (an open
+# stdout file, a gzip test file) read in fixed-size chunks, so neither output
+# is ever held in memory whole.
+#   - default: whitespace-separated tokens must match in order; with
+#     float_tolerance, numeric tokens may differ by that absolute or relative
+#     amount.
+#   - delimiters: extra characters treated as whitespace, e.g. "[]," so a list
+#     printed as [1,2,3] is compared element by element (and "[0, 1]" matches
+#     "[0,1]") instead of as one huge token.
+#   - unordered: the outputs must contain the same lines (whitespace-normalized,
+#     blank lines ignored) in any order. Lines are counted by digest, so memory
+#     grows with the number of distinct lines, not their size.
+
+CHUNK_SIZE = 1 << 16
+
+
+def _delimiter_table(delimiters: str):
+    if not delimiters:
+        return None
+    extra = delimiters.encode("utf-8")
+    return bytes.maketrans(extra, b" " * len(extra))
+
+
+def tokens(stream, chunk_size: int = CHUNK_SIZE, delimiters: str = ""):
+    table = _delimiter_table(delimiters)
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if table:
+            chunk = chunk.translate(table)
+        parts = (pending + chunk).split()
+        # A chunk that doesn't end in whitespace may have cut a token in half.
+        pending = parts.pop() if parts and not chunk[-1:].isspace() else b""
+        yield from parts
+    if pending:
+        yield pending
+
+
+def _line_digests(stream, delimiters: str = "") -> Counter:
+    table = _delimiter_table(delimiters)
+    counts = Counter()
+    for line in stream:
+        normalized = b" ".join((line.translate(table) if table else line).split())
+        if normalized:
+            counts[hashlib.blake2b(normalized, digest_size=16).digest()] += 1
+    return counts
+
+
+def _close(actual: bytes, expected: bytes, tolerance: float) -> bool:
+    try:
+        a, e = float(actual), float(expected)
+    except ValueError:
+        return False
+    return math.isclose(a, e, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def _preview(token: bytes) -> str:
+    text = token.decode("utf-8", errors="replace")
+    return text if len(text) <= 32 else text[:29] + "..."
+
+
+def compare(actual, expected, float_tolerance: float = None, unordered: bool = False, delimiters: str = ""):
+    """
+    Compares two binary streams. Returns (True, None) or (False, reason).
+    float_tolerance applies to ordered comparison only.
+    """
+    if unordered:
+        difference = _line_digests(actual, delimiters)
+        difference.subtract(_line_digests(expected, delimiters))
+        mismatched = sum(abs(n) for n in difference.values())
+        return (True, None) if not mismatched else (False, f"{mismatched} line(s) differ (order ignored)")
+
+    pairs = zip_longest(tokens(actual, delimiters=delimiters), tokens(expected, delimiters=delimiters))
+    for n, (a, e) in enumerate(pairs, 1):
+        if a == e:
+            continue
+        if a is None:
+            return False, f"output ended early at token {n}"
+        if e is None:
+            return False, f"extra output at token {n}: {_preview(a)!r}"
+        if float_tolerance is None or not _close(a, e, float_tolerance):
+            return False, f"token {n}: expected {_preview(e)!r}, got {_preview(a)!r}"
+    return True, None
@@ -0,0 +1,78 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+# On-disk cache of compiled artifacts (C++ binaries, Java class files), shared by
+# every worker process and every user. Entries are directories named by the
+# sha256 of (language, compiler command, source); the least recently used ones
+# are evicted once the cache grows past max_bytes.
+
+
+class CompileCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(language_id: int, compile_flags: list, source_code: str) -> str:
+        digest = hashlib.sha256()
+        for part in (str(language_id), "\0".join(compile_flags), source_code):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def lookup(self, key: str):
+        """
+        Returns (ok, compile_output, entry_dir) for a cached compile, or None.
+        Successful entries hold the artifacts; failed ones only the diagnostics.
+        """
+        entry = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+            os.utime(entry)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return meta["ok"], meta["compile_output"], entry
+
+    def restore(self, entry: str, workdir: str):
+        """Copies cached artifacts into a run directory (copies, so runs can't corrupt the cache)."""
+        for name in os.listdir(entry):
+            if name != "meta.json":
+                shutil.copy2(os.path.join(entry, name), os.path.join(workdir, name))
+
+    def store(self, key: str, ok: bool, compile_output: str, workdir: str = None, artifacts: list = ()):
+        """Publishes a compile result atomically, then evicts down to the size bound."""
+        entry = os.path.join(self.root, key)
+        if os.path.exists(entry):
+            return
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            for name in artifacts:
+                shutil.copy2(os.path.join(workdir, name), os.path.join(staging, name))
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({"ok": ok, "compile_output": compile_output}, f)
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker published the same key first (or the copy failed).
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for item in os.scandir(self.root):
+            if not item.is_dir() or item.name.startswith(".staging-"):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(item.path) if f.is_file())
+            entries.append((item.stat().st_mtime, size, item.path))
+            total += size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
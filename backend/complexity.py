@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import math
+import random
+import asyncio
+
+# Empirical complexity estimation for accepted submissions. The problem's
+# sample input is scaled to geometrically increasing sizes (list and string
+# literals are regenerated at length N, scalars are kept), the program is run
+# on all of them in one executor batch, and CPU time and peak memory are fit
+# against each candidate growth model by least squares (value ~ a + b * f(N)).
+# The model with the smallest residual wins; models within the noise floor of
+# the best are treated as ties and the simplest one is reported. Sizes that
+# time out or crash are left out of the fit.
+#
+# Problems with a stress generator (see stress.py) are measured on generated
+# hidden test cases instead, whose outputs are also checked against the
+# reference solution; any size that fails is reported.
+
+SIZES = [int(n) for n in os.getenv("COMPLEXITY_SIZES", "16,64,256,1024,4096,16384,65536").split(",")]
+MIN_POINTS = 3
+TIME_NOISE = float(os.getenv("COMPLEXITY_TIME_NOISE", "0.005"))      # seconds
+MEMORY_NOISE = float(os.getenv("COMPLEXITY_MEMORY_NOISE", "512"))    # KB
+TIE_RATIO = 1.1
+
+# Simplest first; the order also ranks classes when comparing with the expected one.
+MODELS = (
+    ("O(1)", lambda n: 1.0),
+    ("O(log N)", lambda n: math.log2(n)),
+    ("O(N)", lambda n: float(n)),
+    ("O(N log N)", lambda n: n * math.log2(n)),
+    ("O(N^2)", lambda n: float(n) * n),
+    ("O(2^N)", lambda n: math.ldexp(1.0, n) if n < 1000 else math.inf),
+)
+RANK = {label: i for i, (label, _) in enumerate(MODELS)}
+
+_ALIASES = {
+    "1": "O(1)", "logn": "O(log N)", "n": "O(N)", "nlogn": "O(N log N)",
+    "n2": "O(N^2)", "n^2": "O(N^2)", "n*n": "O(N^2)", "2^n": "O(2^N)", "2n": "O(2^N)",
+}
+
+
+# --- Fitting ---
+def _least_squares(xs: list, ys: list):
+    """(a, b, rss) for ys ~ a + b * xs with b >= 0."""
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    b = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x if var_x else 0.0
+    b = max(b, 0.0)
+    a = mean_y - b * mean_x
+    return a, b, sum((y - a - b * x) ** 2 for x, y in zip(xs, ys))
+
+
+def fit(sizes: list, values: list, noise: float):
+    """Best-fitting model label for values measured at sizes, or None with too few points."""
+    if len(sizes) < MIN_POINTS:
+        return None
+    fits = []
+    for label, f in MODELS:
+        xs = [f(n) for n in sizes]
+        if not all(math.isfinite(x) for x in xs):
+            continue
+        # Scale the feature so huge values (N^2, 2^N) don't swamp the arithmetic.
+        top = max(xs) or 1.0
+        fits.append((label, _least_squares([x / top for x in xs], values)[2]))
+    best = min(rss for _, rss in fits)
+    tolerance = max(best * TIE_RATIO, len(sizes) * noise ** 2)
+    return next(label for label, rss in fits if rss <= tolerance)
+
+
+# --- Expected complexity ---
+def normalize(text: str):
+    """Canonical model label for strings like "O(n log n)", or None if not a candidate class."""
+    match = re.fullmatch(r"\s*O\((.*)\)\s*", text or "")
+    if not match:
+        return None
+    key = re.sub(r"[\s·×]", "", match.group(1).lower()).replace("**", "^")
+    return _ALIASES.get(key)
+
+
+def expected_classes(label: str) -> dict:
+    """{"time", "memory"} from a problem's complexity label, e.g. "O(N) Time, O(1) Space"."""
+    found = {}
+    for part in (label or "").split(","):
+        match = re.match(r"\s*(O\(.*\))\s*(time|space|memory)?", part, re.IGNORECASE)
+        if match:
+            kind = "time" if (match.group(2) or "time").lower() == "time" else "memory"
+            found.setdefault(kind, normalize(match.group(1)))
+    return found
+
+
+def compare(estimated: str, expected: str, floor: str = "O(1)"):
+    """
+    -1 if the estimate is a better class than expected, 0 if equal, 1 if worse,
+    None if unknown. Expectations below `floor` count as `floor`.
+    """
+    if estimated not in RANK or expected not in RANK:
+        return None
+    expected_rank = max(RANK[expected], RANK[floor])
+    return (RANK[estimated] > expected_rank) - (RANK[estimated] < expected_rank)
+
+
+# --- Input scaling ---
+def _literal_spans(sample: str) -> list:
+    """(start, end) of top-level [...] and "..." literals."""
+    spans, depth, start, quote = [], 0, None, None
+    for i, ch in enumerate(sample):
+        if quote:
+            if ch == quote and sample[i - 1] != "\\":
+                quote = None
+                if depth == 0:
+                    spans.append((start, i + 1))
+        elif ch in "\"'":
+            quote = ch
+            if depth == 0:
+                start = i
+        elif ch == "[":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "]" and depth:
+            depth -= 1
+            if depth == 0:
+                spans.append((start, i + 1))
+    return spans
+
+
+def _scale_string(text: str, n: int, rng: random.Random) -> str:
+    alphabet = sorted(set(text)) or ["a"]
+    return "".join(rng.choice(alphabet) for _ in range(n))
+
+
+def _scale_list(values: list, n: int, rng: random.Random) -> list:
+    if values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        lo = min(values)
+        hi = max(max(values), lo + n)  # room for distinct values
+        scaled = [rng.randint(lo, hi) for _ in range(n)]
+        return sorted(scaled) if values == sorted(values) and len(values) > 1 else scaled
+    if values and all(isinstance(v, str) for v in values):
+        length = max(len(v) for v in values)
+        return [_scale_string("".join(values), length, rng) for _ in range(n)]
+    return [rng.choice(values) for _ in range(n)] if values else [0] * n
+
+
+def scale_input(sample: str, n: int, rng: random.Random):
+    """The sample input with its list and string literals regenerated at size n, or None if it has none."""
+    spans = _literal_spans(sample)
+    if not spans:
+        return None
+    parts, last = [], 0
+    for start, end in spans:
+        literal = sample[start:end]
+        if literal[0] == "[":
+            try:
+                values = json.loads(literal)
+            except ValueError:
+                values = json.loads(literal.replace("'", '"'))
+            scaled = json.dumps(_scale_list(values, n, rng), separators=(",", ":"))
+        else:
+            scaled = literal[0] + _scale_string(literal[1:-1], n, rng) + literal[0]
+        parts.extend([sample[last:start], scaled])
+        last = end
+    parts.append(sample[last:])
+    return "".join(parts)
+
+
+# --- Analysis ---
+def analyze(sizes: list, results: list, expected_label: str) -> dict:
+    """Fits Judge0-shaped results (one per size) and compares with the expected classes."""
+    points, failures = [], []
+    for n, r in zip(sizes, results):
+        status = (r or {}).get("status") or {}
+        if status.get("id") == 3:
+            points.append((n, float(r.get("time") or 0), float(r.get("memory") or 0)))
+        else:
+            failures.append({"n": n, "verdict": status.get("description") or (r or {}).get("error") or "Unknown Error"})
+    measured = [p[0] for p in points]
+    estimate = {
+        "time": fit(measured, [p[1] for p in points], TIME_NOISE),
+        "memory": fit(measured, [p[2] for p in points], MEMORY_NOISE),
+    }
+    expected = expected_classes(expected_label)
+    return {
+        "estimated": estimate,
+        "expected": expected,
+        # Every run reads a size-N input, so measured time (and memory, for programs
+        # that read it whole) is at least O(N) whatever the algorithm.
+        "verdict": {kind: compare(estimate[kind], expected.get(kind), floor="O(N)") for kind in estimate},
+        "points": [{"n": n, "time": t, "memory": m} for n, t, m in points],
+        "failures": failures,
+    }
+
+
+async def estimate(judge, source_code: str, language_id: int, sample: str, expected_label: str,
+                   seed=None, on_status=None):
+    """
+    Runs the submission on the scaled sample input at every size in SIZES (one
+    batch, so local executor slots or a single Judge0 batch) and returns
+    analyze()'s report, or None if the sample has nothing to scale.
+    """
+    rng = random.Random(seed)  # seeded, so repeat submissions hit the result cache
+    stdins = [scale_input(sample or "", n, rng) for n in SIZES]
+    if stdins[0] is None:
+        return None
+    results = await judge.execute_batch(source_code, language_id, stdins, on_status=on_status)
+    return analyze(SIZES, results, expected_label)
+
+
+async def estimate_stress(judge, source_code: str, language_id: int, cases: list, expected_label: str) -> dict:
+    """
+    Like estimate(), on stress cases (stress.StressCache.case, one per size) run
+    as hidden tests, so outputs are checked and failing sizes are reported.
+    """
+    results = await asyncio.gather(*(judge.execute_hidden(source_code, language_id, case) for case in cases))
+    return analyze([case["n"] for case in cases], results, expected_label)
@@ -1,105 +1,605 @@
-import chromadb
 import json
 import os
-from chromadb.utils import embedding_functions
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from keyword_index import KeywordIndex, exact_key, reciprocal_rank_fusion
 
-# Initialize the persistent client once
-# This will create/read from the './db' folder
-chroma_client = chromadb.PersistentClient(path="./db")
+# chromadb, the Chroma client and the MiniLM embedding function are created on
+# first use (or by warm_up in the background on app startup), so importing this
+# module is cheap and routes that don't need RAG are served immediately.
+_init_lock = threading.RLock()
+_chroma_client = None
+_default_ef = None
+_collection = None
+_response_collection = None
 
-# Use the default embedding function (all-MiniLM-L6-v2)
-default_ef = embedding_functions.DefaultEmbeddingFunction()
+def get_embedding_function():
+    """The default embedding function (all-MiniLM-L6-v2)."""
+    global _default_ef
+    if _default_ef is None:
+        with _init_lock:
+            if _default_ef is None:
+                from chromadb.utils import embedding_functions
+                _default_ef = embedding_functions.DefaultEmbeddingFunction()
+    return _default_ef
 
-# Create or get the collection
-collection = chroma_client.get_or_create_collection(
-    name="dsa_misconceptions",
-    embedding_function=default_ef
-)
+def _get_client():
+    global _chroma_client
+    if _chroma_client is None:
+        with _init_lock:
+            if _chroma_client is None:
+                import chromadb
+                # This will create/read from the './db' folder
+                _chroma_client = chromadb.PersistentClient(path="./db")
+    return _chroma_client
 
-def load_data(json_file_path="dsa_data.json"):
+def get_collection():
+    """Lazily creates and returns the knowledge-base collection."""
+    global _collection
+    if _collection is None:
+        with _init_lock:
+            if _collection is None:
+                _collection = _get_client().get_or_create_collection(
+                    name="dsa_misconceptions",
+                    embedding_function=get_embedding_function()
+                )
+    return _collection
+
+# --- Query Cache ---
+# Viva turns re-query the same handful of topics. Embeddings depend only on the
+# text (and model), so they are kept in memory and in a small SQLite file that
+# survives restarts; queries come from clients, so the file is bounded like the
+# memory tier (QUERY_CACHE_SIZE, least recently used first) and rows unused for
+# EMBEDDING_CACHE_TTL seconds expire. Top-k results depend on the collection
+# contents, so they are kept in memory only and dropped whenever load_data
+# writes new documents.
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB", "./db/query_cache.sqlite3")
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 86400)))
+
+_embedding_cache = OrderedDict()  # normalized text -> embedding
+_result_cache = OrderedDict()     # (normalized text, n_results) -> list of metadatas
+# Both are used from asyncio.to_thread workers and the problem watcher thread;
+# every read-and-reorder or insert-and-evict goes through this lock.
+_cache_lock = threading.Lock()
+query_cache_stats = {"result_hits": 0, "context_hits": 0, "exact_hits": 0, "embedding_hits": 0, "embedding_disk_hits": 0, "misses": 0}
+
+def _normalize_query(query_text: str) -> str:
+    # MiniLM's tokenizer is uncased, so case and spacing don't change the embedding
+    return " ".join(query_text.lower().split())
+
+def _remember(cache: OrderedDict, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def _recall(cache: OrderedDict, key):
+    """Cached value (marked most recently used), or None."""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def _embedding_db():
+    conn = sqlite3.connect(EMBEDDING_CACHE_DB)
+    conn.execute("CREATE TABLE IF NOT EXISTS embeddings "
+                 "(model TEXT, text TEXT, vector TEXT, last_used REAL, PRIMARY KEY (model, text))")
+    if "last_used" not in [row[1] for row in conn.execute("PRAGMA table_info(embeddings)")]:
+        conn.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL DEFAULT 0")  # files from before trimming
+    return conn
+
+def _trim_embedding_db(conn):
+    conn.execute("DELETE FROM embeddings WHERE last_used < ?", (time.time() - EMBEDDING_CACHE_TTL,))
+    conn.execute(
+        "DELETE FROM embeddings WHERE rowid NOT IN "
+        "(SELECT rowid FROM embeddings ORDER BY last_used DESC LIMIT ?)", (QUERY_CACHE_SIZE,)
+    )
+
+def _embed(text: str, persist: bool = True) -> list:
+    """
+    Embedding for normalized query text: memory -> disk -> model inference.
+    persist=False keeps one-off texts (viva turns) out of the disk cache so they
+    don't push out reusable queries; they only pass through the in-memory LRU.
+    """
+    vector = _recall(_embedding_cache, text)
+    if vector is not None:
+        query_cache_stats["embedding_hits"] += 1
+        return vector
+
+    if persist:
+        try:
+            with _embedding_db() as conn:
+                row = conn.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text = ?", (EMBEDDING_MODEL, text)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE embeddings SET last_used = ? WHERE model = ? AND text = ?",
+                                 (time.time(), EMBEDDING_MODEL, text))
+            if row:
+                vector = json.loads(row[0])
+                query_cache_stats["embedding_disk_hits"] += 1
+        except sqlite3.Error as e:
+            print(f"Embedding cache unavailable: {e}")
+
+    if vector is None:
+        query_cache_stats["misses"] += 1
+        vector = [float(x) for x in get_embedding_function()([text])[0]]
+        if persist:
+            try:
+                with _embedding_db() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, text, vector, last_used) VALUES (?, ?, ?, ?)",
+                        (EMBEDDING_MODEL, text, json.dumps(vector), time.time()),
+                    )
+                    _trim_embedding_db(conn)
+            except sqlite3.Error as e:
+                print(f"Embedding cache unavailable: {e}")
+
+    _remember(_embedding_cache, text, vector)
+    return vector
+
+def invalidate_query_cache():
+    """Drops cached top-k results (embeddings stay valid)."""
+    with _cache_lock:
+        _result_cache.clear()
+
+# --- Keyword Index ---
+# BM25 over the same documents as the collection, for hybrid retrieval. It is
+# built from the collection on first use and then kept in step by the ingest
+# paths (load_data, bulk_ingest) through _index_upserted / _index_deleted.
+keyword_index = KeywordIndex()
+_keyword_index_ready = False
+
+def _ensure_keyword_index():
+    # Called from to_thread workers and the problem watcher at once: the build
+    # runs once, under _init_lock, and ingest updates wait for it (below) so
+    # none lands between reading the collection and marking the index ready.
+    global _keyword_index_ready
+    if not _keyword_index_ready:
+        with _init_lock:
+            if not _keyword_index_ready:
+                existing = get_collection().get(include=["documents", "metadatas"])
+                keyword_index.add(existing['ids'], existing['documents'], existing['metadatas'])
+                _keyword_index_ready = True
+    return keyword_index
+
+def _index_upserted(ids: list, documents: list, metadatas: list):
+    with _init_lock:
+        if _keyword_index_ready:
+            keyword_index.add(ids, documents, metadatas)
+
+def _index_deleted(ids: list):
+    with _init_lock:
+        if _keyword_index_ready:
+            keyword_index.remove(ids)
+
+# --- Context Index ---
+# Viva topics come from a small closed set (the `topic` fields of the knowledge
+# files) or name a specific problem. Each known topic, problem slug and title
+# maps to its expert contexts, pre-ranked: for a topic its misconceptions, then
+# its problems; for a problem the problem itself, then its topic's contexts.
+# search_knowledge answers those keys with a dict lookup and only falls back to
+# hybrid search for free-form queries. Rebuilt at startup and after every load.
+_context_index = {}
+
+def build_context_index():
+    global _context_index
+    index = _ensure_keyword_index()
+    by_topic = {}
+    problems = []
+    for doc_id in sorted(index.metadatas):
+        meta = index.metadatas[doc_id]
+        by_topic.setdefault(exact_key(meta.get('topic', '')), []).append(meta)
+        if meta.get('type') == 'problem':
+            problems.append(meta)
+
+    contexts = {}
+    for topic, metas in by_topic.items():
+        if topic:
+            contexts[topic] = sorted(metas, key=lambda m: m.get('type') != 'misconception')
+    for meta in problems:
+        try:
+            problem = json.loads(meta.get('full_json') or "{}")
+        except ValueError:
+            continue
+        ranked = [meta] + [m for m in contexts.get(exact_key(meta['topic']), []) if m is not meta]
+        for key in (exact_key(problem.get('slug', '')), exact_key(problem.get('title', ''))):
+            if key:
+                contexts.setdefault(key, ranked)  # a topic of the same name takes precedence
+    _context_index = contexts
+    return len(contexts)
+
+def _chroma_where(where: dict):
+    if not where:
+        return None
+    if len(where) == 1:
+        return dict(where)
+    return {"$and": [{k: v} for k, v in where.items()]}
+
+# --- Semantic Response Cache ---
+# Many viva turns are near-duplicates (the same buggy binary search, the same
+# greeting). Tutor replies are stored in a second collection keyed on the
+# embedding of (last tutor turn + student input) and filtered by topic; a new
+# turn whose cosine similarity to a stored one clears the threshold reuses that
+# reply instead of calling the LLM. That only holds for short prose answers:
+# MiniLM puts a fixed solution (`l = m + 1`) right next to the buggy one
+# (`l = m`), so turns containing code are only reused on an exact match of the
+# whitespace-normalized text. Entries expire after a TTL and the least recently
+# used ones are evicted past the size bound.
+VIVA_CACHE_THRESHOLD = float(os.getenv("VIVA_CACHE_THRESHOLD", "0.95"))
+VIVA_SEMANTIC_MAX_CHARS = int(os.getenv("VIVA_SEMANTIC_MAX_CHARS", "200"))
+VIVA_CACHE_TTL = float(os.getenv("VIVA_CACHE_TTL", "86400"))
+VIVA_CACHE_SIZE = int(os.getenv("VIVA_CACHE_SIZE", "2000"))
+
+def get_response_collection():
+    global _response_collection
+    if _response_collection is None:
+        with _init_lock:
+            if _response_collection is None:
+                _response_collection = _get_client().get_or_create_collection(
+                    name="viva_response_cache",
+                    embedding_function=get_embedding_function(),
+                    metadata={"hnsw:space": "cosine"}
+                )
+    return _response_collection
+
+viva_cache_stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+_CODE_MARKERS = re.compile(r"[;{}()\[\]=<>]|\n")
+
+def _viva_cache_text(student_input: str, last_tutor_turn: str) -> str:
+    return _normalize_query(f"{last_tutor_turn}\n{student_input}")
+
+def _viva_exact_text(student_input: str, last_tutor_turn: str) -> str:
+    """Key for code turns: case and inner spacing kept, only trailing whitespace dropped."""
+    return "\n".join(line.rstrip() for line in f"{last_tutor_turn}\n{student_input}".strip().splitlines())
+
+def _is_short_prose(student_input: str) -> bool:
+    return len(student_input) <= VIVA_SEMANTIC_MAX_CHARS and not _CODE_MARKERS.search(student_input.strip())
+
+def _viva_entry_id(topic: str, text: str) -> str:
+    return hashlib.sha256(f"{topic}\0{text}".encode("utf-8")).hexdigest()
+
+def lookup_viva_response(topic: str, student_input: str, last_tutor_turn: str = ""):
+    """
+    Returns a cached tutor reply, or None: for a close-enough short prose turn on
+    the same topic, or for exactly the same turn when it contains code.
     """
-    Reads the JSON file and 'upserts' (updates or inserts) data into ChromaDB.
+    if VIVA_CACHE_SIZE <= 0:
+        return None
+    try:
+        if _is_short_prose(student_input):
+            results = get_response_collection().query(
+                query_embeddings=[_embed(_viva_cache_text(student_input, last_tutor_turn), persist=False)],
+                n_results=1,
+                where={"$and": [{"topic": topic}, {"exact": False}]},
+                include=["metadatas", "distances"]
+            )
+            found = bool(results['ids'] and results['ids'][0])
+            if found:
+                entry_id, meta = results['ids'][0][0], results['metadatas'][0][0]
+                similarity = 1 - results['distances'][0][0]
+        else:
+            entry_id = _viva_entry_id(topic, _viva_exact_text(student_input, last_tutor_turn))
+            results = get_response_collection().get(ids=[entry_id], include=["metadatas"])
+            found = bool(results['ids'])
+            if found:
+                meta, similarity = results['metadatas'][0], 1.0
+    except Exception as e:
+        print(f"Viva cache unavailable: {e}")
+        return None
+
+    if not found:
+        viva_cache_stats["misses"] += 1
+        return None
+
+    now = time.time()
+    if now - meta['created_at'] > VIVA_CACHE_TTL:
+        get_response_collection().delete(ids=[entry_id])
+        viva_cache_stats["expired"] += 1
+        viva_cache_stats["misses"] += 1
+        return None
+    if similarity < VIVA_CACHE_THRESHOLD:
+        viva_cache_stats["misses"] += 1
+        return None
+
+    get_response_collection().update(ids=[entry_id], metadatas=[{**meta, 'last_used': now}])
+    viva_cache_stats["hits"] += 1
+    print(f"Viva cache hit (similarity {similarity:.3f})")
+    return meta['response']
+
+def store_viva_response(topic: str, student_input: str, last_tutor_turn: str, response: str):
+    """Caches a tutor reply, then evicts least recently used entries past VIVA_CACHE_SIZE."""
+    if VIVA_CACHE_SIZE <= 0 or not response:
+        return
+    exact = not _is_short_prose(student_input)
+    text = (_viva_exact_text if exact else _viva_cache_text)(student_input, last_tutor_turn)
+    now = time.time()
+    try:
+        get_response_collection().upsert(
+            ids=[_viva_entry_id(topic, text)],
+            embeddings=[_embed(_viva_cache_text(student_input, last_tutor_turn), persist=False)],
+            documents=[text],
+            metadatas=[{'topic': topic, 'response': response, 'exact': exact, 'created_at': now, 'last_used': now}]
+        )
+        viva_cache_stats["stores"] += 1
+
+        overflow = get_response_collection().count() - VIVA_CACHE_SIZE
+        if overflow > 0:
+            entries = get_response_collection().get(include=["metadatas"])
+            by_age = sorted(zip(entries['ids'], entries['metadatas']), key=lambda e: e[1]['last_used'])
+            get_response_collection().delete(ids=[entry_id for entry_id, _ in by_age[:overflow]])
+            viva_cache_stats["evictions"] += overflow
+    except Exception as e:
+        print(f"Viva cache unavailable: {e}")
+
+def get_viva_cache_stats() -> dict:
+    total = viva_cache_stats["hits"] + viva_cache_stats["misses"]
+    return {
+        **viva_cache_stats,
+        "entries": get_response_collection().count(),
+        "hit_rate": round(viva_cache_stats["hits"] / total, 3) if total else 0.0,
+        "threshold": VIVA_CACHE_THRESHOLD,
+        "ttl": VIVA_CACHE_TTL,
+        "max_entries": VIVA_CACHE_SIZE,
+    }
+
+# --- Incremental Ingestion ---
+# load_data only re-embeds what changed. Every document gets a content-derived
+# ID and a content hash; the hashes from the last run of each source file are
+# kept in a manifest, so unchanged documents are skipped, changed ones are
+# re-embedded in batches and documents that vanished from the file are deleted.
+INGEST_MANIFEST = os.getenv("INGEST_MANIFEST", "./db/ingest_manifest.json")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+
+def source_name(path: str) -> str:
+    """Manifest/metadata key for a source file: its path relative to backend/, whatever the cwd."""
+    return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(__file__)))
+
+def _content_hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _to_document(item: dict):
+    """Returns (doc_id, text, metadata) for a knowledge base entry, or None if unrecognized."""
+    # Determine format based on keys
+    if 'misconception' in item:
+        # Old format (misconceptions). The ID hashes the identifying fields, so it
+        # survives reordering the file and edits to the explanation.
+        identity = _content_hash(item['topic'], item['concept'], item['misconception'])[:16]
+        doc_id = f"misconception_{item['topic'].replace(' ', '_')}_h{identity}"
+        text_content = f"Topic: {item['topic']}. Concept: {item['concept']}. Misconception: {item['misconception']}."
+        # Normalized metadata for RAG
+        meta = item.copy()
+        meta['type'] = 'misconception'
+
+    elif 'title' in item:
+        # New format (Striver Sheet Problems)
+        doc_id = f"problem_{item['id']}_{item['slug']}"
+        text_content = (
+            f"Problem: {item['title']}. Topic: {item['topic']}. "
+            f"Description: {item['description']}. "
+            f"Hints: {' '.join(item['hints'])}. "
+            f"Editorial: {item['editorial']}"
+        )
+        # Normalize metadata keys so viva_logic doesn't crash on access
+        meta = {
+            'topic': item['topic'],
+            'concept': item['title'],
+            'misconception': item['description'][:200] + "...", # Fallback for display
+            'diagnostic_question': item['hints'][0] if item['hints'] else "Check edge cases.",
+            'explanation': item['editorial'],
+            'type': 'problem',
+            'full_json': json.dumps(item) # Store full data stringified if needed
+        }
+
+    else:
+        return None
+
+    return doc_id, text_content, meta
+
+def _read_manifest() -> dict:
+    try:
+        with open(INGEST_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(manifest: dict):
+    tmp_path = INGEST_MANIFEST + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, INGEST_MANIFEST)
+
+def _legacy_ids(source: str, types: set, current_ids: set) -> list:
+    """
+    IDs written before the manifest existed (position-based misconception IDs,
+    documents without a `source`), which a first incremental load replaces.
+    Documents from before `type` was stored are misconceptions.
+    """
+    existing = get_collection().get(include=["metadatas"])
+    return [
+        doc_id for doc_id, meta in zip(existing['ids'], existing['metadatas'])
+        if doc_id not in current_ids
+        and (meta or {}).get('source') in (None, source)
+        and (meta or {}).get('type', 'misconception') in types
+    ]
+
+def load_data(json_file_path="dsa_data.json", batch_size=None, records=None):
+    """
+    Reads the JSON file and incrementally syncs it into ChromaDB: new and changed
+    documents are embedded (in batches of `batch_size`) and upserted, documents
+    removed from the file are deleted, unchanged ones are skipped.
     Supports both misconception format and Striver problem format.
+    `records` (an iterable of items) replaces reading the file, e.g. to stream a
+    sharded problem corpus; json_file_path still names the source.
+    Returns counts of added/updated/unchanged/deleted documents.
     """
     if not os.path.exists(json_file_path):
         print(f"Error: {json_file_path} not found.")
         return
 
     print(f"Loading data from {json_file_path}...")
-    
-    with open(json_file_path, 'r') as f:
-        data = json.load(f)
-
-    ids = []
-    documents = []
-    metadatas = []
-
-    for idx, item in enumerate(data):
-        # Determine format based on keys
-        if 'misconception' in item:
-            # Old format (misconceptions)
-            doc_id = f"misconception_{item['topic'].replace(' ', '_')}_{idx}"
-            text_content = f"Topic: {item['topic']}. Concept: {item['concept']}. Misconception: {item['misconception']}."
-            # Normalized metadata for RAG
-            meta = item.copy()
-            meta['type'] = 'misconception'
-        
-        elif 'title' in item:
-            # New format (Striver Sheet Problems)
-            doc_id = f"problem_{item['id']}_{item['slug']}"
-            text_content = (
-                f"Problem: {item['title']}. Topic: {item['topic']}. "
-                f"Description: {item['description']}. "
-                f"Hints: {' '.join(item['hints'])}. "
-                f"Editorial: {item['editorial']}"
-            )
-            # Normalize metadata keys so viva_logic doesn't crash on access
-            meta = {
-                'topic': item['topic'],
-                'concept': item['title'],
-                'misconception': item['description'][:200] + "...", # Fallback for display
-                'diagnostic_question': item['hints'][0] if item['hints'] else "Check edge cases.",
-                'explanation': item['editorial'],
-                'type': 'problem',
-                'full_json': json.dumps(item) # Store full data stringified if needed
-            }
-        
-        else:
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    source = source_name(json_file_path)
+
+    if records is None:
+        with open(json_file_path, 'r') as f:
+            records = json.load(f)
+
+    documents = {}  # doc_id -> (text, metadata, content hash); duplicates keep the last entry
+    for item in records:
+        doc = _to_document(item)
+        if doc is None:
             continue
+        doc_id, text_content, meta = doc
+        meta['source'] = source
+        content_hash = _content_hash(text_content, json.dumps(meta, sort_keys=True))
+        meta['content_hash'] = content_hash
+        documents[doc_id] = (text_content, meta, content_hash)
 
-        ids.append(doc_id)
-        documents.append(text_content)
-        metadatas.append(meta)
+    if not documents:
+        print("No valid data found to insert.")
+        return
 
-    if ids:
-        collection.upsert(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+    manifest = _read_manifest()
+    previous = manifest.get(source)
+
+    # The manifest can be out of step with the collection (e.g. ./db was wiped),
+    # so documents it calls unchanged must actually be present.
+    unchanged = [doc_id for doc_id, (_, _, h) in documents.items() if (previous or {}).get(doc_id) == h]
+    present = set(get_collection().get(ids=unchanged, include=[])['ids']) if unchanged else set()
+    changed = [doc_id for doc_id in documents if doc_id not in present]
+
+    if previous is None:
+        removed = _legacy_ids(source, {meta['type'] for _, meta, _ in documents.values()}, set(documents))
+    else:
+        removed = [doc_id for doc_id in previous if doc_id not in documents]
+
+    for start in range(0, len(changed), batch_size):
+        batch = changed[start:start + batch_size]
+        texts = [documents[doc_id][0] for doc_id in batch]
+        get_collection().upsert(
+            ids=batch,
+            documents=texts,
+            metadatas=[documents[doc_id][1] for doc_id in batch],
+            embeddings=[[float(x) for x in vector] for vector in get_embedding_function()(texts)]
         )
-        print(f"Successfully upserted {len(ids)} documents into ChromaDB.")
+        _index_upserted(batch, texts, [documents[doc_id][1] for doc_id in batch])
+        print(f"  embedded {min(start + batch_size, len(changed))}/{len(changed)}")
+
+    if removed:
+        get_collection().delete(ids=removed)
+        _index_deleted(removed)
+
+    manifest[source] = {doc_id: h for doc_id, (_, _, h) in documents.items()}
+    _write_manifest(manifest)
+    if changed or removed:
+        invalidate_query_cache()
+        build_context_index()
+
+    summary = {
+        "added": sum(1 for doc_id in changed if doc_id not in (previous or {})),
+        "updated": sum(1 for doc_id in changed if doc_id in (previous or {})),
+        "unchanged": len(present),
+        "deleted": len(removed),
+    }
+    print(f"Synced {json_file_path}: {summary}")
+    return summary
+
+def remove_source(json_file_path):
+    """Deletes every document loaded from a source file that no longer exists."""
+    source = source_name(json_file_path)
+    manifest = _read_manifest()
+    ids = list(manifest.pop(source, {}))
+    if ids:
+        get_collection().delete(ids=ids)
+        _index_deleted(ids)
+        invalidate_query_cache()
+        build_context_index()
+    _write_manifest(manifest)
+    print(f"Removed {len(ids)} documents from {json_file_path}")
+
+def search_knowledge(query_text, k=5, where=None):
+    """
+    Hybrid retrieval: returns the metadata of the top-k documents for the query,
+    ranked by reciprocal rank fusion of vector search and BM25. `where` filters
+    on metadata equality, e.g. {"type": "problem"} or {"topic": "Arrays"}.
+    A known topic or problem is answered from the context index; a query that
+    exactly names a concept or document is answered from the keyword index.
+    Neither runs the embedding model.
+    """
+    key = (_normalize_query(query_text), k, tuple(sorted((where or {}).items())))
+    cached = _recall(_result_cache, key)
+    if cached is not None:
+        query_cache_stats["result_hits"] += 1
+        return cached
+
+    contexts = _context_index.get(exact_key(query_text))
+    if contexts:
+        query_cache_stats["context_hits"] += 1
+        return [m for m in contexts if all(m.get(f) == v for f, v in (where or {}).items())][:k]
+
+    index = _ensure_keyword_index()
+    keyword_ranking = [doc_id for doc_id, _ in index.search(key[0], k * 4, where)]
+
+    exact = index.lookup(key[0], where)
+    if exact:
+        query_cache_stats["exact_hits"] += 1
+        ranked = exact + [doc_id for doc_id in keyword_ranking if doc_id not in exact]
+        matches = [index.get(doc_id) for doc_id in ranked[:k]]
     else:
-        print("No valid data found to insert.")
+        results = get_collection().query(
+            query_embeddings=[_embed(key[0])],
+            n_results=k * 4,
+            where=_chroma_where(where)
+        )
+        vector_ranking = results['ids'][0] if results['ids'] else []
+        found = dict(zip(vector_ranking, results['metadatas'][0])) if vector_ranking else {}
+        ranked = reciprocal_rank_fusion([vector_ranking, keyword_ranking])[:k]
+        matches = [found.get(doc_id) or index.get(doc_id) for doc_id in ranked]
+
+    _remember(_result_cache, key, matches)
+    return matches
 
-def query_knowledge(query_text, n_results=1):
+def query_knowledge(query_text, n_results=1, where=None):
     """
     Queries the database for the most relevant diagnostic questions/misconceptions.
-    Returns the metadata of the top match.
+    Returns the metadata of the top match (see search_knowledge for top-k).
+    Repeated queries are served from the query cache without model inference.
     """
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=n_results
-    )
-    
-    if results['ids'] and results['ids'][0]:
+    matches = search_knowledge(query_text, n_results, where)
+
+    if matches:
         # Return the metadata of the first result
-        top_result = results['metadatas'][0][0]
+        top_result = matches[0]
         print(f"Found relevant context: {top_result['topic']} - {top_result['misconception']}")
         return top_result
     else:
         print("No relevant context found.")
         return None
 
+def warm_up():
+    """
+    Opens Chroma, builds the in-memory indexes and loads the embedding model
+    (downloading its weights on first run). Called in the background on startup.
+    """
+    get_collection()
+    get_response_collection()
+    build_context_index()
+    get_embedding_function()(["warm up"])
+
 if __name__ == "__main__":
     # If run directly, load the data and test a query
     load_data()
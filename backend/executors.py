@@ -0,0 +1,81 @@
+import asyncio
+
+# Judge0 status ids. Every executor reports results in Judge0's shape so routes
+# and the result cache don't care which backend produced them.
+STATUS_DESCRIPTIONS = {
+    1: "In Queue",
+    2: "Processing",
+    3: "Accepted",
+    4: "Wrong Answer",
+    5: "Time Limit Exceeded",
+    6: "Compilation Error",
+    7: "Runtime Error (SIGSEGV)",
+    8: "Runtime Error (SIGXFSZ)",
+    9: "Runtime Error (SIGFPE)",
+    10: "Runtime Error (SIGABRT)",
+    11: "Runtime Error (NZEC)",
+    12: "Runtime Error (Other)",
+    13: "Internal Error",
+    14: "Exec Format Error",
+}
+
+
+def status(status_id: int) -> dict:
+    return {"id": status_id, "description": STATUS_DESCRIPTIONS[status_id]}
+
+
+class Executor:
+    """
+    Interface every execution backend implements (see JudgeService).
+    Results are Judge0-shaped dicts: status, stdout, stderr, compile_output, time, memory.
+    """
+
+    name = "base"
+    supports_hidden_tests = False  # can run stored tests via execute_hidden
+
+    async def start(self):
+        """Warm up resources (called on app startup)."""
+
+    async def close(self):
+        """Release resources (called on app shutdown)."""
+
+    async def get_languages(self):
+        raise NotImplementedError
+
+    async def submit_code(self, source_code: str, language_id: int, stdin: str = "", on_done=None):
+        """
+        Starts an execution and returns a token for get_submission_result.
+        on_done, if given, is called exactly once: when a backend that runs the
+        code itself has finished, or when the submission was handed off (or failed).
+        """
+        raise NotImplementedError
+
+    async def get_submission_result(self, token: str):
+        raise NotImplementedError
+
+    async def execute_code(self, source_code: str, language_id: int, stdin: str = ""):
+        """Runs the program to completion and returns its result."""
+        raise NotImplementedError
+
+    async def execute_hidden(self, source_code: str, language_id: int, input_ref: str, output_ref: str,
+                             options: dict = None):
+        """
+        Runs the program on a test from the hidden test store (see hidden_tests.py)
+        and checks its output with checker.compare(**options). A mismatch is
+        reported as Wrong Answer with a "checker_message".
+        """
+        raise NotImplementedError
+
+    async def execute_batch(self, source_code: str, language_id: int, stdins: list, on_status=None):
+        """
+        Runs one program against every stdin. Results are returned in order.
+        on_status, if given, is called with {"stage": "case", "index": i, "result": ...}
+        as each case finishes.
+        """
+        async def run_case(i, stdin):
+            result = await self.execute_code(source_code, language_id, stdin)
+            if on_status:
+                on_status({"stage": "case", "index": i, "result": result})
+            return result
+
+        return list(await asyncio.gather(*(run_case(i, stdin) for i, stdin in enumerate(stdins))))
@@ -0,0 +1,35 @@
+import re
+import json
+
+# Stress-test generators, one module per problem (named by the problem's
+# "stress": {"generator": ...} entry, see stress.py). Each module defines
+#
+#   generate(n, rng, out)  writes a size-n input, in the format of the problem's
+#                          test_cases, to the text stream `out`, drawing only
+#                          from `rng` so the same seed gives the same input;
+#   solve(inp, out)        the reference solution: reads an input from `inp`
+#                          and writes the expected output to `out`.
+#
+# Inputs are written piece by piece, so large sizes never exist as one string.
+
+WRITE_BATCH = 4096
+_ASSIGNMENT = re.compile(r"(\w+)\s*=\s*(\[[^\]]*\]|-?\d+)")
+
+
+def write_list(out, values):
+    """Writes an iterable of ints as [a,b,c] without building the whole string."""
+    out.write("[")
+    batch, first = [], True
+    for value in values:
+        batch.append(str(value))
+        if len(batch) == WRITE_BATCH:
+            out.write(("" if first else ",") + ",".join(batch))
+            batch, first = [], False
+    if batch:
+        out.write(("" if first else ",") + ",".join(batch))
+    out.write("]")
+
+
+def read_input(inp) -> dict:
+    """Parses "nums = [1,2,3], target = 9" into {"nums": [1, 2, 3], "target": 9}."""
+    return {name: json.loads(value) for name, value in _ASSIGNMENT.findall(inp.read())}
@@ -0,0 +1,30 @@
+import bisect
+from generators import read_input, write_list
+
+
+def generate(n, rng, out):
+    n = max(n, 1)
+    start = rng.randint(-1_000_000_000, -500_000_000)
+    gaps = [rng.randint(1, 1_000) for _ in range(n)]
+    # Half the time the target is absent (it falls strictly between two values).
+    k = rng.randrange(n)
+    target = start + sum(gaps[:k + 1])
+    if rng.random() < 0.5 and gaps[k] > 1:
+        target -= 1
+
+    def values():
+        value = start
+        for gap in gaps:
+            value += gap
+            yield value
+
+    out.write("nums = ")
+    write_list(out, values())
+    out.write(f", target = {target}")
+
+
+def solve(inp, out):
+    data = read_input(inp)
+    nums, target = data["nums"], data["target"]
+    i = bisect.bisect_left(nums, target)
+    out.write(str(i if i < len(nums) and nums[i] == target else -1))
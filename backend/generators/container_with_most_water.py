@@ -0,0 +1,18 @@
+from generators import read_input, write_list
+
+
+def generate(n, rng, out):
+    out.write("height = ")
+    write_list(out, (rng.randint(0, 10_000) for _ in range(max(n, 2))))
+
+
+def solve(inp, out):
+    height = read_input(inp)["height"]
+    left, right, best = 0, len(height) - 1, 0
+    while left < right:
+        best = max(best, (right - left) * min(height[left], height[right]))
+        if height[left] < height[right]:
+            left += 1
+        else:
+            right -= 1
+    out.write(str(best))
@@ -0,0 +1,14 @@
+from generators import read_input, write_list
+
+
+def generate(n, rng, out):
+    out.write("nums = ")
+    write_list(out, (rng.randint(-10_000, 10_000) for _ in range(max(n, 1))))
+
+
+def solve(inp, out):
+    best = current = None
+    for value in read_input(inp)["nums"]:
+        current = value if current is None or current < 0 else current + value
+        best = current if best is None else max(best, current)
+    out.write(str(best))
@@ -0,0 +1,10 @@
+from generators import read_input, write_list
+
+
+def generate(n, rng, out):
+    out.write("head = ")
+    write_list(out, (rng.randint(-5_000, 5_000) for _ in range(n)))
+
+
+def solve(inp, out):
+    write_list(out, reversed(read_input(inp)["head"]))
@@ -0,0 +1,24 @@
+from generators import read_input, write_list
+
+
+def generate(n, rng, out):
+    # Exactly one pair can reach the target: the two chosen values lie in
+    # [4e8, 5e8) and every other value in [-2e8, 2e8], so any other sum falls short.
+    n = max(n, 2)
+    i, j = sorted(rng.sample(range(n), 2))
+    a, b = rng.sample(range(400_000_000, 500_000_000), 2)
+    values = (a if k == i else b if k == j else rng.randint(-200_000_000, 200_000_000) for k in range(n))
+    out.write("nums = ")
+    write_list(out, values)
+    out.write(f", target = {a + b}")
+
+
+def solve(inp, out):
+    data = read_input(inp)
+    seen = {}
+    for j, value in enumerate(data["nums"]):
+        i = seen.get(data["target"] - value)
+        if i is not None:
+            out.write(f"[{i},{j}]")
+            return
+        seen[value] = j
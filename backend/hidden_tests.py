@@ -0,0 +1,103 @@
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+# Content-addressed storage for large hidden test files. Each file is gzipped
+# under <root>/<first two hex digits>/<sha256 of the uncompressed bytes>.gz, so
+# identical tests are stored once and a reference never goes stale. Problems
+# refer to stored tests from their test_cases:
+#
+#   {"input_ref": "<sha256>", "output_ref": "<sha256>",
+#    "checker": {"float_tolerance": 1e-6, "unordered": false}}
+#
+#   python hidden_tests.py input.txt expected.txt --float-tolerance 1e-6
+#
+# adds both files and prints that entry. Files are streamed in chunks both ways;
+# the local executor decompresses the input straight into the run's stdin file.
+# The store (like the stress cache that also writes to it) is data, not source:
+# the default directory is gitignored and is deployed separately.
+
+HIDDEN_TESTS_DIR = os.getenv(
+    "HIDDEN_TESTS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hidden_tests")
+)
+CHUNK_SIZE = 1 << 20
+
+
+class HiddenTestStore:
+    def __init__(self, root: str = HIDDEN_TESTS_DIR):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.gz")
+
+    def __contains__(self, digest: str):
+        return os.path.exists(self.path(digest))
+
+    def put(self, source) -> str:
+        """Stores a file (path or binary file object) and returns its digest."""
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                return self.put(f)
+
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            # mtime=0 keeps the compressed bytes reproducible.
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as out:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+            name = digest.hexdigest()
+            os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+            if name in self:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, self.path(name))
+            return name
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def remove(self, digest: str):
+        """Deletes a stored file. Only for files nothing else refers to (see stress.py)."""
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def open(self, digest: str):
+        """Binary stream of the uncompressed file. Raises FileNotFoundError."""
+        return gzip.open(self.path(digest), "rb")
+
+    def copy_to(self, digest: str, dest_path: str):
+        """Decompresses a stored file to dest_path, chunk by chunk."""
+        with self.open(digest) as src, open(dest_path, "wb") as dest:
+            shutil.copyfileobj(src, dest, CHUNK_SIZE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a hidden test case to the hidden test store.")
+    parser.add_argument("input", help="stdin file")
+    parser.add_argument("output", help="expected stdout file")
+    parser.add_argument("--float-tolerance", type=float)
+    parser.add_argument("--unordered", action="store_true", help="accept output lines in any order")
+    parser.add_argument("--root", default=HIDDEN_TESTS_DIR)
+    args = parser.parse_args()
+
+    for path in (args.input, args.output):
+        if not os.path.exists(path):
+            print(f"Error: {path} not found.")
+            sys.exit(1)
+    store = HiddenTestStore(args.root)
+    case = {"input_ref": store.put(args.input), "output_ref": store.put(args.output)}
+    checker = {"float_tolerance": args.float_tolerance, "unordered": args.unordered or None}
+    if any(checker.values()):
+        case["checker"] = {k: v for k, v in checker.items() if v is not None}
+    print(json.dumps(case))
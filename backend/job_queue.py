@@ -0,0 +1,149 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+
+# Admission control in front of JudgeService. Executions take a slot from a
+# global pool (and a per-user pool); waiters are served by priority lane, then
+# FIFO. When the queue is full new work is rejected with a Retry-After hint
+# instead of piling more load onto the executor.
+#
+# State lives in-process, which is exact for a single worker. A shared backend
+# (e.g. Redis) would have to provide the same acquire/release/stats contract.
+
+PRIORITY_RUN = 0     # interactive "run" clicks
+PRIORITY_SUBMIT = 1  # bulk graded submissions
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Execution queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SubmissionQueue:
+    def __init__(self, max_concurrency: int = 16, per_user: int = 2, max_depth: int = 200):
+        self.max_concurrency = max_concurrency
+        self.per_user = per_user
+        self.max_depth = max_depth
+
+        self._waiters = []                  # heap of [priority, seq, user, future]
+        self._seq = itertools.count()
+        self._running = 0
+        self._running_by_user = {}
+        self._avg_service = 1.0             # EWMA of slot hold time, seconds
+        self.stats = {"admitted": 0, "rejected": 0, "completed": 0, "total_wait": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrency=int(os.getenv("QUEUE_MAX_CONCURRENCY", "16")),
+            per_user=int(os.getenv("QUEUE_PER_USER", "2")),
+            max_depth=int(os.getenv("QUEUE_MAX_DEPTH", "200")),
+        )
+
+    def _can_run(self, user: str) -> bool:
+        return self._running < self.max_concurrency and self._running_by_user.get(user, 0) < self.per_user
+
+    def _grant(self, user: str):
+        self._running += 1
+        self._running_by_user[user] = self._running_by_user.get(user, 0) + 1
+
+    def _dispatch(self):
+        """Wakes waiters in priority order, skipping users already at their limit."""
+        if self._running >= self.max_concurrency:
+            return
+        blocked = []
+        while self._waiters and self._running < self.max_concurrency:
+            entry = heapq.heappop(self._waiters)
+            user, future = entry[2], entry[3]
+            if future.done():
+                continue
+            if self._running_by_user.get(user, 0) >= self.per_user:
+                blocked.append(entry)
+                continue
+            self._grant(user)
+            future.set_result(None)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+    def _purge(self):
+        """Drops waiters whose clients went away, so they don't count towards max_depth."""
+        live = [entry for entry in self._waiters if not entry[3].done()]
+        if len(live) != len(self._waiters):
+            heapq.heapify(live)
+            self._waiters = live
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up for a newcomer."""
+        backlog = len(self._waiters) + self._running
+        return max(1, round(backlog * self._avg_service / self.max_concurrency))
+
+    async def acquire(self, user: str, priority: int = PRIORITY_SUBMIT):
+        if not self._waiters and self._can_run(user):
+            self._grant(user)
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_depth:
+            self._purge()
+            if len(self._waiters) >= self.max_depth:
+                self.stats["rejected"] += 1
+                raise QueueFull(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), user, future])
+        # Waiters ahead may all be users at their per-user limit; a free slot must
+        # still go to this one rather than wait for the next release.
+        self._dispatch()
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user)  # slot was granted just as the client went away
+            else:
+                future.cancel()
+            raise
+        self.stats["admitted"] += 1
+        self.stats["total_wait"] += time.monotonic() - started
+
+    def release(self, user: str):
+        self._running -= 1
+        remaining = self._running_by_user.get(user, 1) - 1
+        if remaining:
+            self._running_by_user[user] = remaining
+        else:
+            self._running_by_user.pop(user, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user: str, priority: int = PRIORITY_SUBMIT):
+        """`async with queue.slot(user, priority):` around one execution."""
+        await self.acquire(user, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_service = 0.8 * self._avg_service + 0.2 * (time.monotonic() - started)
+            self.stats["completed"] += 1
+            self.release(user)
+
+    def get_stats(self) -> dict:
+        waiting = [w for w in self._waiters if not w[3].done()]
+        return {
+            "running": self._running,
+            "queued": len(waiting),
+            "queued_run": sum(1 for w in waiting if w[0] == PRIORITY_RUN),
+            "queued_submit": sum(1 for w in waiting if w[0] == PRIORITY_SUBMIT),
+            "active_users": len(self._running_by_user),
+            "max_concurrency": self.max_concurrency,
+            "per_user": self.per_user,
+            "max_depth": self.max_depth,
+            "avg_service_time": round(self._avg_service, 3),
+            "avg_wait_time": round(self.stats["total_wait"] / self.stats["admitted"], 3) if self.stats["admitted"] else 0.0,
+            "admitted": self.stats["admitted"],
+            "rejected": self.stats["rejected"],
+            "completed": self.stats["completed"],
+        }
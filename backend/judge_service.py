@@ -1,65 +1,187 @@
 import os
-import requests
-import time
+import hmac
+import json
+import asyncio
+import secrets
+from collections import OrderedDict
+import httpx
 from dotenv import load_dotenv
+import result_cache
+from executors import Executor
 
 load_dotenv()
 
-class JudgeService:
+class Judge0Executor(Executor):
+    """Executes code on a remote Judge0 instance."""
+
+    name = "judge0"
+
     def __init__(self):
         # Using specific host and auth as requested
         self.base_url = "https://ce.judge0.com"
         self.auth_user = "a1133bc6-a0f6-46bf-a2d8-6157418c6fe2"
-        
+
         self.headers = {
             "X-Auth-User": self.auth_user,
             "Content-Type": "application/json"
         }
 
-    def get_languages(self):
+        # Connection pool settings. Every request goes to the same Judge0 host,
+        # so the pool-wide limits are effectively per-host limits.
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("JUDGE0_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("JUDGE0_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("JUDGE0_KEEPALIVE_EXPIRY", "30")),
+        )
+        self.timeout = httpx.Timeout(
+            float(os.getenv("JUDGE0_TIMEOUT", "10")),
+            connect=float(os.getenv("JUDGE0_CONNECT_TIMEOUT", "5")),
+        )
+        self._client = None
+
+        # Result retrieval: try Judge0's synchronous `wait=true` mode first,
+        # then fall back to callbacks (if a public callback URL is configured)
+        # raced against exponential-backoff polling.
+        # wait=true holds the POST open until the run ends, and a POST that times out
+        # can't be retried without running the program twice (its token is never
+        # seen). So it is only used when the read timeout outlasts the wall limit
+        # sent with each such submission.
+        self.wall_limit = float(os.getenv("JUDGE0_WALL_LIMIT", "5"))
+        self.use_wait = os.getenv("JUDGE0_WAIT", "true").lower() == "true"
+        if self.use_wait and self.timeout.read <= self.wall_limit:
+            print("WARNING: JUDGE0_TIMEOUT does not exceed JUDGE0_WALL_LIMIT; polling instead of wait=true.")
+            self.use_wait = False
+        self.callback_url = os.getenv("JUDGE0_CALLBACK_URL")
+        self.poll_initial_delay = float(os.getenv("JUDGE0_POLL_INITIAL_DELAY", "0.02"))
+        self.poll_max_delay = float(os.getenv("JUDGE0_POLL_MAX_DELAY", "1.0"))
+        self.poll_deadline = float(os.getenv("JUDGE0_POLL_DEADLINE", "15"))
+        self._pending = {}               # token -> Future resolved by the callback endpoint
+        self._early_results = OrderedDict()  # token -> (secret, result) for callbacks that beat the POST reply
+        # Each submission's callback_url carries its own random secret; the callback
+        # route only accepts a result whose secret matches the one issued for its token.
+        self._callback_secrets = OrderedDict()  # token -> secret
+        self._issued_secrets = OrderedDict()    # secrets of submissions whose POST hasn't returned
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def close(self):
+        """Close the pooled connections (called on app shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_languages(self):
         """Fetch supported languages from Judge0."""
-        url = f"{self.base_url}/languages"
         try:
-            response = requests.get(url, headers=self.headers)
+            response = await self.client.get("/languages")
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error fetching languages: {e}")
             return []
 
-    def submit_code(self, source_code: str, language_id: int, stdin: str = ""):
+    def _new_callback(self):
+        """(callback_url carrying a fresh secret, secret)."""
+        secret = secrets.token_urlsafe(16)
+        self._issued_secrets[secret] = None
+        while len(self._issued_secrets) > 10000:
+            self._issued_secrets.popitem(last=False)
+        separator = "&" if "?" in self.callback_url else "?"
+        return f"{self.callback_url}{separator}secret={secret}", secret
+
+    def _expect_callback(self, token: str, secret: str):
+        self._issued_secrets.pop(secret, None)
+        if token and secret:
+            self._callback_secrets[token] = secret
+            while len(self._callback_secrets) > 10000:
+                self._callback_secrets.popitem(last=False)
+
+    def _take_early_result(self, token: str):
+        """A callback that arrived before its token was registered, if its secret checks out."""
+        early = self._early_results.pop(token, None)
+        if early is None:
+            return None
+        secret, result = early
+        expected = self._callback_secrets.get(token)
+        return result if expected and hmac.compare_digest(expected, secret) else None
+
+    async def _create_submission(self, source_code: str, language_id: int, stdin: str = "", wait: bool = False):
         """
-        Submits code to Judge0 and returns the token.
+        POSTs a submission and returns the response body.
+        With wait=True Judge0 answers with the finished result instead of a bare token.
         """
-        url = f"{self.base_url}/submissions"
         querystring = {"base64_encoded": "false", "fields": "*"}
-        
         payload = {
             "source_code": source_code,
             "language_id": language_id,
             "stdin": stdin
         }
-        
+        if wait:
+            querystring["wait"] = "true"
+            payload["wall_time_limit"] = self.wall_limit
+        secret = None
+        if self.callback_url:
+            payload["callback_url"], secret = self._new_callback()
+
         try:
-            response = requests.post(url, json=payload, headers=self.headers, params=querystring)
+            response = await self.client.post("/submissions", json=payload, params=querystring)
             response.raise_for_status()
-            return response.json().get("token")
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 403:
+            body = response.json()
+            self._expect_callback(body.get("token"), secret)
+            return body
+        except httpx.ReadTimeout:
+            # Judge0 may still be running it; resubmitting would run it twice.
+            print("Error submitting code: Judge0 did not answer in time")
+            if wait:
+                print("WARNING: Judge0 wait=true timed out (queued too long?), polling from now on.")
+                self.use_wait = False
+            return None
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 403:
                 print("WARNING: Judge0 API returned 403 (Not Subscribed). Using MOCK response.")
-                return "MOCK_TOKEN_123"
+                return {"token": "MOCK_TOKEN_123"}
+            if wait and e.response.status_code == 400:
+                # Instance has synchronous submissions disabled ("wait not allowed").
+                print("WARNING: Judge0 rejected wait=true, falling back to polling.")
+                self.use_wait = False
+                return await self._create_submission(source_code, language_id, stdin)
             print(f"Error submitting code: {e}")
             return None
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error submitting code: {e}")
             return None
+        finally:
+            self._issued_secrets.pop(secret, None)
+
+    async def submit_code(self, source_code: str, language_id: int, stdin: str = "", on_done=None):
+        """
+        Submits code to Judge0 and returns the token. Judge0 queues the run itself,
+        so on_done fires once the submission is handed off.
+        """
+        try:
+            body = await self._create_submission(source_code, language_id, stdin)
+        finally:
+            if on_done:
+                on_done()
+        return body.get("token") if body else None
 
-    def get_submission_result(self, token: str):
+    async def get_submission_result(self, token: str):
         """
         Fetches the result of a submission using its token.
         """
         if token == "MOCK_TOKEN_123":
             return {
+                "token": token,
                 "status": {"id": 3, "description": "Accepted"},
                 "time": "0.01",
                 "memory": "1024",
@@ -68,44 +190,330 @@ class JudgeService:
                 "compile_output": None
             }
 
-        url = f"{self.base_url}/submissions/{token}"
         querystring = {"base64_encoded": "false", "fields": "*"}
-        
+
         try:
-            response = requests.get(url, headers=self.headers, params=querystring)
+            response = await self.client.get(f"/submissions/{token}", params=querystring)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error fetching result: {e}")
             return None
 
-    def execute_code(self, source_code: str, language_id: int, stdin: str = ""):
+    async def submit_batch(self, source_code: str, language_id: int, stdins: list):
+        """
+        Submits one program against several stdins in a single /submissions/batch request.
+        Returns the tokens in input order (None for rejected entries).
+        """
+        querystring = {"base64_encoded": "false"}
+        payload = {"submissions": []}
+        callback_secrets = []
+        for stdin in stdins:
+            entry = {"source_code": source_code, "language_id": language_id, "stdin": stdin}
+            if self.callback_url:
+                entry["callback_url"], secret = self._new_callback()
+                callback_secrets.append(secret)
+            payload["submissions"].append(entry)
+
+        try:
+            response = await self.client.post("/submissions/batch", json=payload, params=querystring)
+            response.raise_for_status()
+            tokens = [item.get("token") for item in response.json()]
+            for token, secret in zip(tokens, callback_secrets):
+                self._expect_callback(token, secret)
+            return tokens
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 403:
+                print("WARNING: Judge0 API returned 403 (Not Subscribed). Using MOCK response.")
+                return ["MOCK_TOKEN_123"] * len(stdins)
+            print(f"Error submitting batch: {e}")
+            return None
+        except httpx.HTTPError as e:
+            print(f"Error submitting batch: {e}")
+            return None
+        finally:
+            for secret in callback_secrets:
+                self._issued_secrets.pop(secret, None)
+
+    async def get_batch_results(self, tokens: list):
+        """
+        Fetches several submissions in one request. Returns results in token order.
+        """
+        results = {}
+        remote = [t for t in tokens if t != "MOCK_TOKEN_123"]
+        if len(remote) < len(tokens):
+            results["MOCK_TOKEN_123"] = await self.get_submission_result("MOCK_TOKEN_123")
+
+        if remote:
+            querystring = {"tokens": ",".join(remote), "base64_encoded": "false", "fields": "*"}
+            try:
+                response = await self.client.get("/submissions/batch", params=querystring)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"Error fetching batch: {e}")
+                return None
+            for token, item in zip(remote, response.json().get("submissions", [])):
+                results[token] = item
+        return [results.get(t) for t in tokens]
+
+    async def execute_batch(self, source_code: str, language_id: int, stdins: list, on_status=None):
+        """
+        Runs one program against every stdin and returns the results in order.
+        Unfinished tokens are polled together with the same backoff as execute_code.
+        """
+        notify = on_status or (lambda event: None)
+        tokens = await self.submit_batch(source_code, language_id, stdins)
+        if not tokens:
+            return [{"error": "Failed to submit code"} for _ in stdins]
+
+        results = [None] * len(tokens)
+
+        def finish(i, result):
+            results[i] = result
+            notify({"stage": "case", "index": i, "result": result})
+
+        for i, token in enumerate(tokens):
+            if not token:
+                finish(i, {"error": "Failed to submit code"})
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.poll_deadline
+        delay = self.poll_initial_delay
+        running = False
+        while True:
+            pending = [i for i, r in enumerate(results) if r is None]
+            for i in pending:
+                early = self._take_early_result(tokens[i])
+                if early is not None:
+                    finish(i, early)
+            pending = [i for i in pending if results[i] is None]
+            if not pending:
+                for token in tokens:
+                    self._callback_secrets.pop(token, None)
+                return results
+            if loop.time() >= deadline:
+                for i in pending:
+                    finish(i, {"error": "Execution timed out"})
+                    self._callback_secrets.pop(tokens[i], None)
+                return results
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.poll_max_delay)
+
+            fetched = await self.get_batch_results([tokens[i] for i in pending])
+            if fetched is None:
+                for i in pending:
+                    finish(i, {"error": "Failed to retrieve result"})
+                return results
+            for i, result in zip(pending, fetched):
+                status_id = result.get("status", {}).get("id") if result else None
+                # Status IDs: 1 (In Queue), 2 (Processing)
+                if status_id == 2 and not running:
+                    running = True
+                    notify({"stage": "running"})
+                if result and status_id not in [1, 2]:
+                    finish(i, result)
+
+    def resolve_callback(self, result: dict, secret: str = "") -> bool:
+        """
+        Delivers a result pushed by Judge0 to `callback_url`.
+        Returns False if the payload carries no token; raises PermissionError if
+        `secret` is not the one issued with that token's callback_url.
+        """
+        token = result.get("token")
+        if not token:
+            return False
+        expected = self._callback_secrets.get(token)
+        if expected is None:
+            # The POST that issued this token hasn't returned yet, so the token is
+            # unknown; the secret must still be one issued to a POST in flight. The
+            # pairing is checked once the token arrives (see _take_early_result).
+            if secret not in self._issued_secrets:
+                raise PermissionError("Invalid callback secret")
+            self._early_results[token] = (secret, result)
+            while len(self._early_results) > 1000:
+                self._early_results.popitem(last=False)
+            return True
+        if not hmac.compare_digest(expected, secret):
+            raise PermissionError("Invalid callback secret")
+        future = self._pending.get(token)
+        if future is not None and not future.done():
+            future.set_result(result)
+        else:
+            self._early_results[token] = (secret, result)
+            while len(self._early_results) > 1000:
+                self._early_results.popitem(last=False)
+        return True
+
+    async def wait_for_result(self, token: str):
+        """
+        Waits for a finished result, preferring the callback future and polling
+        with exponential backoff (starting at tens of ms) in the meantime.
+        """
+        early = self._take_early_result(token)
+        if early is not None:
+            self._callback_secrets.pop(token, None)
+            return early
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[token] = future
+        deadline = loop.time() + self.poll_deadline
+        delay = self.poll_initial_delay
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return {"error": "Execution timed out"}
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+
+                result = await self.get_submission_result(token)
+                if not result:
+                    return {"error": "Failed to retrieve result"}
+
+                # Status IDs: 1 (In Queue), 2 (Processing)
+                if result.get("status", {}).get("id") not in [1, 2]:
+                    return result
+                delay = min(delay * 2, self.poll_max_delay)
+        finally:
+            self._pending.pop(token, None)
+            self._early_results.pop(token, None)
+            self._callback_secrets.pop(token, None)
+
+    async def execute_code(self, source_code: str, language_id: int, stdin: str = ""):
         """
-        Orchestrates the submission and result polling.
+        Orchestrates the submission and result retrieval.
         """
-        token = self.submit_code(source_code, language_id, stdin)
+        body = await self._create_submission(source_code, language_id, stdin, wait=self.use_wait)
+        token = body.get("token") if body else None
         print(f"DEBUG: Token: {token}")
-        
+
         if not token:
             print("DEBUG: Failed to get token")
             return {"error": "Failed to submit code"}
 
-        # Poll for result
-        max_retries = 10
-        for i in range(max_retries):
-            # Wait before polling to give Judge0 time to process
-            time.sleep(1)
-            
-            result = self.get_submission_result(token)
-            print(f"DEBUG: Attempt {i+1} Result: {result}")
-            
-            if not result:
-                return {"error": "Failed to retrieve result"}
-                
-            status_id = result.get("status", {}).get("id")
-            
-            # Status IDs: 1 (In Queue), 2 (Processing)
-            if status_id not in [1, 2]:
-                return result
-            
-        return {"error": "Execution timed out"}
+        # wait=true already returned the finished submission
+        if body.get("status", {}).get("id") not in [None, 1, 2]:
+            self._callback_secrets.pop(token, None)
+            return body
+
+        return await self.wait_for_result(token)
+
+
+class JudgeService:
+    """
+    Entry point used by the routes. Delegates to the executor selected by
+    JUDGE_BACKEND ("judge0" or "local") and serves repeat runs from the result cache.
+    """
+
+    def __init__(self, executor: Executor = None):
+        self.executor = executor or self._make_executor(os.getenv("JUDGE_BACKEND", "judge0"))
+
+        # Content-addressed cache of deterministic verdicts (see result_cache.py)
+        self.cache = result_cache.from_env()
+
+    @staticmethod
+    def _make_executor(backend: str) -> Executor:
+        if backend == "local":
+            from local_executor import LocalExecutor
+            return LocalExecutor()
+        return Judge0Executor()
+
+    async def start(self):
+        await self.executor.start()
+
+    async def close(self):
+        await self.executor.close()
+
+    async def get_languages(self):
+        """Fetch supported languages from the active backend."""
+        return await self.executor.get_languages()
+
+    async def submit_code(self, source_code: str, language_id: int, stdin: str = "", on_done=None):
+        """Starts an execution and returns its token. See Executor.submit_code for on_done."""
+        return await self.executor.submit_code(source_code, language_id, stdin, on_done)
+
+    async def get_submission_result(self, token: str):
+        """Fetches the result of an execution using its token."""
+        return await self.executor.get_submission_result(token)
+
+    def resolve_callback(self, result: dict, secret: str = "") -> bool:
+        """Forwards a Judge0 webhook payload; other backends never issue callbacks."""
+        if not isinstance(self.executor, Judge0Executor):
+            return False
+        return self.executor.resolve_callback(result, secret)
+
+    async def execute_code(self, source_code: str, language_id: int, stdin: str = ""):
+        """
+        Runs code and returns its result.
+        Deterministic verdicts are served from the result cache.
+        """
+        key = result_cache.make_key(source_code, language_id, stdin)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await self.executor.execute_code(source_code, language_id, stdin)
+        if result.get("token") != "MOCK_TOKEN_123":
+            await self.cache.put(key, result)
+        return result
+
+    async def execute_batch(self, source_code: str, language_id: int, stdins: list, on_status=None):
+        """
+        Runs one program against every stdin, only executing cache misses.
+        on_status(event) receives progress events: {"stage": "compiling" | "running"}
+        and {"stage": "case", "index": i, "result": ...} as each case finishes.
+        """
+        keys = [result_cache.make_key(source_code, language_id, stdin) for stdin in stdins]
+        cached = list(await asyncio.gather(*(self.cache.get(key) for key in keys)))
+        misses = [i for i, r in enumerate(cached) if r is None]
+        if on_status:
+            for i, result in enumerate(cached):
+                if result is not None:
+                    on_status({"stage": "case", "index": i, "result": result})
+        if not misses:
+            return cached
+
+        def forward(event):
+            # Executor indices refer to the misses only
+            if "index" in event:
+                event = {**event, "index": misses[event["index"]]}
+            on_status(event)
+
+        results = await self.executor.execute_batch(
+            source_code, language_id, [stdins[i] for i in misses],
+            on_status=forward if on_status else None,
+        )
+        for i, result in zip(misses, results):
+            cached[i] = result
+            if result.get("token") != "MOCK_TOKEN_123":
+                await self.cache.put(keys[i], result)
+        return cached
+
+    @property
+    def supports_hidden_tests(self) -> bool:
+        return self.executor.supports_hidden_tests
+
+    async def execute_hidden(self, source_code: str, language_id: int, case: dict):
+        """
+        Runs a stored test case ({"input_ref", "output_ref", "checker"}) on the
+        active backend, which must support hidden tests. Stored files are
+        content-addressed, so their references stand in for stdin in the cache key.
+        """
+        options = case.get("checker") or {}
+        key = result_cache.make_key(
+            source_code, language_id,
+            f"hidden:{case['input_ref']}:{case['output_ref']}:{json.dumps(options, sort_keys=True)}",
+        )
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await self.executor.execute_hidden(
+            source_code, language_id, case["input_ref"], case["output_ref"], options
+        )
+        await self.cache.put(key, result)
+        return result
@@ -0,0 +1,127 @@
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+# In-process BM25 index over the knowledge base documents, kept next to the
+# Chroma collection (see database_manager). Dense retrieval misses exact terms
+# like problem slugs or "two pointers"; this index catches them, and its ranking
+# is fused with the vector ranking by reciprocal rank fusion.
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower())
+
+
+def exact_key(text: str) -> str:
+    """Normalizes a title, slug or query for exact lookups ("Two Sum" == "two-sum")."""
+    return " ".join(tokenize(text))
+
+
+def matches(metadata: dict, where: dict) -> bool:
+    return not where or all(metadata.get(k) == v for k, v in where.items())
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """Fuses ranked lists of ids; returns ids by descending sum of 1 / (k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class KeywordIndex:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}   # term -> {doc_id: term frequency}
+        self.doc_terms = {}  # doc_id -> Counter of terms
+        self.doc_lengths = {}
+        self.metadatas = {}  # doc_id -> metadata
+        self.exact = {}      # exact key -> set of doc_ids
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    @staticmethod
+    def _exact_keys(doc_id: str, metadata: dict) -> set:
+        keys = {exact_key(doc_id), exact_key(metadata.get('concept', ''))}
+        if metadata.get('type') == 'problem':
+            try:
+                problem = json.loads(metadata.get('full_json') or "{}")
+            except ValueError:
+                problem = {}
+            keys.update(exact_key(problem.get(field, "")) for field in ("slug", "title"))
+        keys.discard("")
+        return keys
+
+    def _remove(self, doc_id: str):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        for key in self._exact_keys(doc_id, self.metadatas.pop(doc_id)):
+            ids = self.exact.get(key)
+            if ids:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.exact[key]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def add(self, ids: list, documents: list, metadatas: list):
+        """Adds or replaces documents."""
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, documents, metadatas):
+                self._remove(doc_id)
+                terms = Counter(tokenize(text))
+                self.doc_terms[doc_id] = terms
+                self.metadatas[doc_id] = metadata
+                self.doc_lengths[doc_id] = sum(terms.values())
+                self.total_length += self.doc_lengths[doc_id]
+                for term, tf in terms.items():
+                    self.postings.setdefault(term, {})[doc_id] = tf
+                for key in self._exact_keys(doc_id, metadata):
+                    self.exact.setdefault(key, set()).add(doc_id)
+
+    def remove(self, ids: list):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def lookup(self, query: str, where: dict = None) -> list:
+        """Documents whose id, title or slug equals the query exactly."""
+        with self._lock:
+            return sorted(d for d in self.exact.get(exact_key(query), ()) if matches(self.metadatas[d], where))
+
+    def search(self, query: str, k: int = 10, where: dict = None) -> list:
+        """Top-k (doc_id, BM25 score) pairs, restricted to documents matching `where`."""
+        with self._lock:
+            if not self.doc_terms:
+                return []
+            n_docs = len(self.doc_terms)
+            avg_length = self.total_length / n_docs
+            scores = {}
+            for term in set(tokenize(query)):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    if not matches(self.metadatas[doc_id], where):
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def get(self, doc_id: str):
+        return self.metadatas.get(doc_id)
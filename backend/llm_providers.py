@@ -0,0 +1,291 @@
+import os
+import time
+import asyncio
+
+# Async LLM providers for the viva loop. Each provider streams text chunks and
+# sits behind a circuit breaker; ProviderChain tries them in order (optionally
+# hedging to the next one when the first is slow to produce its first token).
+# The rule-based offline reply in viva_logic.py remains the terminal fallback.
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+GEMINI_MODEL = "gemini-1.5-flash"
+
+
+class AllProvidersFailed(Exception):
+    pass
+
+
+class StreamInterrupted(Exception):
+    """The winning provider failed after some of the reply was already yielded."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and skips the provider
+    for `reset_timeout` seconds, then lets one trial request through (half-open).
+    Other requests fail fast until that trial succeeds, fails or is released.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may go out now. In half-open state this claims the single trial."""
+        state = self.state
+        if state == "half-open":
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+        return state != "open"
+
+    def release(self):
+        """Gives back a claimed trial that ended without an outcome (e.g. it was cancelled)."""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            # a failed half-open trial re-opens the breaker for another full period
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+
+class Provider:
+    name = "base"
+
+    def __init__(self, first_token_timeout: float, chunk_timeout: float, breaker: CircuitBreaker):
+        self.first_token_timeout = first_token_timeout
+        self.chunk_timeout = chunk_timeout
+        self.breaker = breaker
+
+    def stream(self, system_prompt: str, history_messages: list, student_code: str):
+        """Async iterator of reply chunks."""
+        raise NotImplementedError
+
+
+class GroqProvider(Provider):
+    name = "groq"
+
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
+        from groq import AsyncGroq
+        self.client = AsyncGroq(api_key=api_key)
+
+    async def stream(self, system_prompt, history_messages, student_code):
+        stream = await self.client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                *history_messages,
+                {"role": "user", "content": student_code},
+            ],
+            max_tokens=300,
+            temperature=0.7,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(
+            GEMINI_MODEL,
+            safety_settings=[
+                {"category": c, "threshold": "BLOCK_NONE"}
+                for c in [
+                    "HARM_CATEGORY_HARASSMENT",
+                    "HARM_CATEGORY_HATE_SPEECH",
+                    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                    "HARM_CATEGORY_DANGEROUS_CONTENT",
+                ]
+            ]
+        )
+
+    async def stream(self, system_prompt, history_messages, student_code):
+        prompt = system_prompt + "\n\n"
+        for m in history_messages:
+            role = "Tutor" if m["role"] == "assistant" else "Student"
+            prompt += f"{role}: {m['content']}\n"
+        prompt += f"Student: {student_code}\nTutor:"
+
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class ProviderChain:
+    """
+    Streams from the first healthy provider. A provider that fails or times out
+    before its first chunk hands over to the next one immediately. With
+    hedge_after set, the next provider is also started when the current one has
+    not produced a first chunk within that many seconds; whichever answers
+    first wins and the other is cancelled.
+    """
+
+    def __init__(self, providers: list, hedge_after: float = None):
+        self.providers = providers
+        self.hedge_after = hedge_after
+
+    async def _first_chunk(self, provider: Provider, chunks):
+        return await asyncio.wait_for(chunks.__anext__(), provider.first_token_timeout)
+
+    async def stream(self, system_prompt: str, history_messages: list, student_code: str):
+        waiting = list(self.providers)
+        racing = {}  # task -> (provider, chunk iterator)
+        trials = set()  # providers whose half-open trial this request holds
+
+        def launch():
+            """Starts the next provider whose breaker lets a request through; returns it or None."""
+            while waiting:
+                provider = waiting.pop(0)
+                half_open = provider.breaker.state == "half-open"
+                if not provider.breaker.allow():
+                    continue
+                if half_open:
+                    trials.add(provider)
+                chunks = provider.stream(system_prompt, history_messages, student_code)
+                racing[asyncio.create_task(self._first_chunk(provider, chunks))] = (provider, chunks)
+                return provider
+            return None
+
+        def release_trial(provider):
+            # A trial cut short (cancelled, client went away) showed nothing either
+            # way; let the next request make it.
+            if provider in trials:
+                provider.breaker.release()
+
+        winner = None
+        try:
+            launch()
+            while racing and winner is None:
+                hedge = self.hedge_after if waiting else None
+                done, _ = await asyncio.wait(racing, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = launch()
+                    if hedged:
+                        print(f"[LLM] No first token within {hedge}s, hedging to {hedged.name}")
+                    continue
+                for task in done:
+                    provider, chunks = racing.pop(task)
+                    try:
+                        first = task.result()
+                    except (Exception, StopAsyncIteration) as e:
+                        print(f"[{provider.name} Error] {type(e).__name__}: {e}")
+                        provider.breaker.record_failure()
+                        await chunks.aclose()
+                        continue
+                    if winner is None:
+                        winner = (provider, chunks, first)
+                    else:
+                        provider.breaker.record_success()  # answered, just not first
+                        await chunks.aclose()
+                if winner is None and not racing:
+                    launch()
+        finally:
+            for task, (provider, chunks) in racing.items():
+                task.cancel()
+                release_trial(provider)
+            for task, (provider, chunks) in racing.items():
+                try:
+                    await task
+                except (Exception, StopAsyncIteration, asyncio.CancelledError):
+                    pass
+                await chunks.aclose()
+
+        if winner is None:
+            raise AllProvidersFailed("No LLM provider produced a response")
+
+        provider, chunks, first = winner
+        try:
+            yield first
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), provider.chunk_timeout)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+            provider.breaker.record_success()
+        except Exception as e:
+            # Mid-stream failure: what was sent can't be retracted, the caller decides
+            # whether a partial reply is usable.
+            print(f"[{provider.name} Error] {type(e).__name__}: {e}")
+            provider.breaker.record_failure()
+            raise StreamInterrupted(str(e)) from e
+        finally:
+            if provider.breaker.trial_in_flight:
+                release_trial(provider)
+            await chunks.aclose()
+
+    def status(self) -> list:
+        return [{"provider": p.name, "breaker": p.breaker.state} for p in self.providers]
+
+
+def _env_key(name: str):
+    value = os.getenv(name)
+    if not value or "<" in value or "your_" in value:
+        return None
+    return value
+
+
+def build_provider_chain() -> ProviderChain:
+    """Configures Groq and Gemini (in that order) from the environment."""
+    breaker = lambda: CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+        reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+    )
+    providers = []
+
+    groq_key = _env_key("GROQ_API_KEY")
+    if groq_key:
+        try:
+            providers.append(GroqProvider(
+                groq_key,
+                first_token_timeout=float(os.getenv("GROQ_TIMEOUT", "8")),
+                chunk_timeout=float(os.getenv("GROQ_CHUNK_TIMEOUT", "10")),
+                breaker=breaker(),
+            ))
+            print("[AI] Groq (Llama 3) enabled")
+        except Exception as e:
+            print(f"[AI] Groq init failed: {e}")
+
+    gemini_key = _env_key("GEMINI_API_KEY")
+    if gemini_key:
+        try:
+            providers.append(GeminiProvider(
+                gemini_key,
+                first_token_timeout=float(os.getenv("GEMINI_TIMEOUT", "10")),
+                chunk_timeout=float(os.getenv("GEMINI_CHUNK_TIMEOUT", "10")),
+                breaker=breaker(),
+            ))
+            print("[AI] Gemini 1.5 Flash enabled")
+        except Exception as e:
+            print(f"[AI] Gemini init failed: {e}")
+
+    hedge_ms = os.getenv("LLM_HEDGE_MS")
+    return ProviderChain(providers, hedge_after=float(hedge_ms) / 1000 if hedge_ms else None)
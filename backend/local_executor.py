@@ -0,0 +1,384 @@
+import os
+import sys
+import uuid
+import shutil
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from executors import Executor, status
+from sandbox import (CPU_LIMIT, WALL_LIMIT, COMPILE_LIMIT, OUTPUT_LIMIT_KB, SANDBOX_STRICT, check_isolation,
+                     make_workdir, open_output, run_process, verdict)
+import warm_pool
+import checker
+from compile_cache import CompileCache
+from hidden_tests import HiddenTestStore
+
+# --- Language Toolchains ---
+# Keyed by the Judge0 language ids the frontend already sends.
+LANGUAGES = {
+    71: {
+        "name": "Python (3, local)",
+        "source": "main.py",
+        "compile": None,
+        "run": [sys.executable, "-I", "main.py"],
+        "tool": sys.executable,
+    },
+    54: {
+        "name": "C++ (GCC, local)",
+        "source": "main.cpp",
+        "compile": ["g++", "-O2", "-std=c++17", "-o", "main", "main.cpp"],
+        "pch_flags": ["-O2", "-std=c++17"],
+        "artifacts": lambda workdir: ["main"],
+        "run": ["./main"],
+        "tool": "g++",
+    },
+    62: {
+        "name": "Java (local)",
+        "source": "Main.java",
+        "compile": ["javac", "Main.java"],
+        "run": ["java", "-Xmx256m", "-Xss64m", "-XX:+UseSerialGC", "-cp", ".", "Main"],
+        "tool": "javac",
+        "artifacts": lambda workdir: [f for f in os.listdir(workdir) if f.endswith(".class")],
+        # The JVM reserves far more address space than it uses; it is bounded by -Xmx instead.
+        "limit_address_space": False,
+    },
+    63: {
+        "name": "JavaScript (Node.js, local)",
+        "source": "main.js",
+        "compile": None,
+        "run": ["node", "--max-old-space-size=256", "main.js"],
+        "tool": "node",
+        "limit_address_space": False,
+    },
+}
+
+# --- Warm Paths ---
+WARM_PYTHON = os.getenv("LOCAL_WARM_PYTHON", "true").lower() == "true"
+CPP_PCH = os.getenv("LOCAL_CPP_PCH", "true").lower() == "true"
+PERSISTENT_JVM = os.getenv("LOCAL_PERSISTENT_JVM", "true").lower() == "true"
+
+# --- Hidden Tests ---
+# Stored test outputs are checked from the stdout file, so they may be far larger
+# than the output returned for inline cases.
+HIDDEN_OUTPUT_LIMIT_KB = int(os.getenv("LOCAL_HIDDEN_OUTPUT_LIMIT_KB", "65536"))
+
+# --- Compile Cache ---
+COMPILE_CACHE_DIR = os.getenv("LOCAL_COMPILE_CACHE_DIR", os.path.join(warm_pool.WARM_DIR, "compile-cache"))
+COMPILE_CACHE_MB = int(os.getenv("LOCAL_COMPILE_CACHE_MB", "512"))
+
+
+# --- Worker Job (runs inside a pool process) ---
+# Per-worker state. The JVM and the Python runner exit on their own when this
+# worker dies (stdin EOF).
+_jvm = None
+_python = None
+_pch_dir = None
+_cache = None
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _prepare_toolchains():
+    """Builds shared warm artifacts (currently the C++ precompiled header)."""
+    if CPP_PCH:
+        warm_pool.cpp_pch_dir(LANGUAGES[54]["pch_flags"])
+
+
+def _compile_command(lang: dict) -> list:
+    global _pch_dir
+    cmd = list(lang["compile"])
+    if CPP_PCH and "pch_flags" in lang:
+        if _pch_dir is None:
+            _pch_dir = warm_pool.cpp_pch_dir(lang["pch_flags"]) or ""
+        if _pch_dir:
+            cmd[1:1] = ["-I", _pch_dir]
+    return cmd
+
+
+def _java_runner():
+    global _jvm
+    if _jvm is None:
+        _jvm = warm_pool.JvmRunner()
+    return _jvm
+
+
+def _python_runner():
+    global _python
+    if _python is None:
+        _python = warm_pool.PythonRunner()
+    return _python
+
+
+def _compile_cache():
+    global _cache
+    if _cache is None:
+        _cache = CompileCache(COMPILE_CACHE_DIR, COMPILE_CACHE_MB * 1024 * 1024) if COMPILE_CACHE_MB > 0 else False
+    return _cache
+
+
+def _compile(language_id: int, lang: dict, source_code: str, workdir: str):
+    """
+    Compiles the source in workdir, reusing artifacts from the compile cache when the
+    same source was built before with the same command. Returns (ok, compile_output);
+    ok is None when the compiler didn't finish in time.
+    """
+    if not lang["compile"]:
+        return True, None
+
+    use_jvm = language_id == 62 and PERSISTENT_JVM
+    cache = _compile_cache()
+    key = None
+    if cache:
+        key = CompileCache.make_key(language_id, lang["compile"], source_code)
+        hit = cache.lookup(key)
+        if hit:
+            ok, compile_output, entry = hit
+            if ok:
+                cache.restore(entry, workdir)
+            return ok, compile_output
+
+    if use_jvm:
+        ok, compile_output = _java_runner().compile(workdir, COMPILE_LIMIT)
+    else:
+        cmd = _compile_command(lang)
+        compiled = run_process(cmd, workdir, os.devnull, COMPILE_LIMIT, COMPILE_LIMIT, False,
+                               readonly=(_pch_dir,) if _pch_dir else ())
+        ok = None if compiled["timed_out"] else compiled["exit_code"] == 0
+        compile_output = (compiled["stderr"] + compiled["stdout"]) or ("Compilation timed out" if ok is None else "")
+
+    # Timeouts depend on machine load, so only definite outcomes are cached.
+    if cache and ok is not None:
+        cache.store(key, ok, compile_output, workdir, lang["artifacts"](workdir) if ok else ())
+    return ok, compile_output
+
+
+def _write_source(language_id: int, lang: dict, source_code: str) -> str:
+    # The persistent JVM can only see workdirs made in its own home.
+    workdir = _java_runner().workdir() if language_id == 62 and PERSISTENT_JVM else make_workdir("run_")
+    with open(os.path.join(workdir, lang["source"]), "w") as f:
+        f.write(source_code)
+    return workdir
+
+
+def _compile_error(ok, compile_output: str) -> dict:
+    """
+    A failed compile. A timeout is reported as an internal error rather than a
+    compilation error, so the result cache doesn't keep it.
+    """
+    return {
+        "status": status(13 if ok is None else 6),
+        "stdout": None,
+        "stderr": None,
+        "compile_output": compile_output,
+        "time": None,
+        "memory": None,
+    }
+
+
+def _compile_job(source_code: str, language_id: int):
+    """Compiles once ahead of a batch so every case is a cache hit. Returns a compile error result or None."""
+    lang = LANGUAGES.get(language_id)
+    if lang is None or not lang["compile"]:
+        return None
+    workdir = _write_source(language_id, lang, source_code)
+    try:
+        ok, compile_output = _compile(language_id, lang, source_code, workdir)
+        return None if ok else _compile_error(ok, compile_output)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _check_hidden(workdir: str, output_ref: str, options: dict):
+    with open_output(os.path.join(workdir, ".stdout")) as actual, HiddenTestStore().open(output_ref) as expected:
+        return checker.compare(actual, expected, **options)
+
+
+def _run_job(source_code: str, language_id: int, stdin: str, cpu_limit: float, wall_limit: float,
+             hidden: tuple = None) -> dict:
+    """
+    hidden=(input_ref, output_ref, checker options) runs a stored test instead of
+    `stdin`: the input is streamed from the hidden test store and the output is
+    checked here, against the stdout file. Its stdout is not returned.
+    """
+    lang = LANGUAGES.get(language_id)
+    if lang is None:
+        return {"status": status(14), "stderr": f"Unsupported language id {language_id}",
+                "stdout": None, "compile_output": None, "time": None, "memory": None}
+
+    workdir = _write_source(language_id, lang, source_code)
+    try:
+        stdin_path = os.path.join(workdir, ".stdin")
+        if hidden:
+            HiddenTestStore().copy_to(hidden[0], stdin_path)
+        else:
+            with open(stdin_path, "w") as f:
+                f.write(stdin or "")
+        output_limit = HIDDEN_OUTPUT_LIMIT_KB if hidden else OUTPUT_LIMIT_KB
+
+        ok, compile_output = _compile(language_id, lang, source_code, workdir)
+        if not ok:
+            return _compile_error(ok, compile_output)
+
+        # The persistent JVM was started with the inline output limit.
+        if language_id == 62 and PERSISTENT_JVM and not hidden:
+            run = _java_runner().run(workdir, stdin_path, wall_limit)
+        elif language_id == 71 and WARM_PYTHON:
+            run = _python_runner().run(workdir, stdin_path, cpu_limit, wall_limit, output_limit)
+        else:
+            run = run_process(lang["run"], workdir, stdin_path, cpu_limit, wall_limit,
+                              lang.get("limit_address_space", True), output_limit)
+        result = {
+            "status": status(verdict(run, cpu_limit)),
+            "stdout": run["stdout"],
+            "stderr": run["stderr"] or None,
+            "compile_output": None,
+            "exit_code": run["exit_code"],
+            "time": f"{run['cpu_time']:.3f}",
+            "wall_time": f"{run['wall_time']:.3f}",
+            "memory": run["memory"],
+        }
+        if hidden:
+            result["stdout"] = None
+            if result["status"]["id"] == 3:
+                ok, message = _check_hidden(workdir, hidden[1], hidden[2])
+                if not ok:
+                    result["status"] = status(4)
+                    result["checker_message"] = message
+        return result
+    except Exception as e:
+        return {"status": status(13), "stderr": str(e), "stdout": None,
+                "compile_output": None, "time": None, "memory": None}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class LocalExecutor(Executor):
+    """
+    Runs submissions on this machine in a pool of pre-started worker processes.
+    Each run is a separate child with rlimits (CPU, address space, output size),
+    its own session and uid, private mount and network namespaces that show it
+    only the system directories and its working directory, no capabilities and a
+    seccomp filter (checked at startup, see sandbox.check_isolation).
+    Workers keep warm paths (see warm_pool.py) and are recycled after
+    LOCAL_WORKER_RECYCLE jobs.
+    """
+
+    name = "local"
+    supports_hidden_tests = True
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or int(os.getenv("LOCAL_WORKERS", str(os.cpu_count() or 2)))
+        self.recycle_after = int(os.getenv("LOCAL_WORKER_RECYCLE", "200"))
+        self._pool = None
+        self._prepare = None
+        self._jobs = OrderedDict()  # token -> Task, for the submit/poll API
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, max_tasks_per_child=self.recycle_after)
+        return self._pool
+
+    async def start(self):
+        """Pre-start every worker so the first submissions don't pay process start-up."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers)))
+        print(f"[Local Executor] {self.workers} workers ready")
+        # Raises if the sandbox can be escaped; only missing namespaces are tolerated.
+        problems = await loop.run_in_executor(self.pool, check_isolation)
+        for problem in problems:
+            print(f"[Local Executor] WARNING: sandbox: {problem}")
+        if problems and SANDBOX_STRICT:
+            raise RuntimeError("Sandbox isolation incomplete and LOCAL_SANDBOX_STRICT=1; refusing to start")
+        # Building the precompiled header takes a few seconds on first boot; don't block startup on it.
+        self._prepare = loop.run_in_executor(self.pool, _prepare_toolchains)
+
+    async def _run(self, fn, *args):
+        """
+        Runs fn in the pool. If a worker died (killed, OOM, crashed interpreter) the
+        whole pool is broken; it is replaced so later jobs get fresh workers, and
+        BrokenProcessPool is re-raised for the caller to report.
+        """
+        pool = self.pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            if self._pool is pool:
+                print("[Local Executor] worker pool broken, starting a new one")
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def _internal_error(self, error: Exception) -> dict:
+        return {"status": status(13), "stderr": f"Worker process died: {error}", "stdout": None,
+                "compile_output": None, "time": None, "memory": None, "token": str(uuid.uuid4())}
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def get_languages(self):
+        return [
+            {"id": lang_id, "name": lang["name"]}
+            for lang_id, lang in LANGUAGES.items()
+            if shutil.which(lang["tool"])
+        ]
+
+    async def execute_code(self, source_code: str, language_id: int, stdin: str = ""):
+        try:
+            result = await self._run(_run_job, source_code, language_id, stdin, CPU_LIMIT, WALL_LIMIT)
+        except BrokenProcessPool as e:
+            return self._internal_error(e)
+        result["token"] = str(uuid.uuid4())
+        return result
+
+    async def execute_hidden(self, source_code: str, language_id: int, input_ref: str, output_ref: str,
+                             options: dict = None):
+        try:
+            result = await self._run(
+                _run_job, source_code, language_id, None, CPU_LIMIT, WALL_LIMIT,
+                (input_ref, output_ref, options or {})
+            )
+        except BrokenProcessPool as e:
+            return self._internal_error(e)
+        result["token"] = str(uuid.uuid4())
+        return result
+
+    async def execute_batch(self, source_code: str, language_id: int, stdins: list, on_status=None):
+        """Compiles once (populating the compile cache), then runs every case in parallel."""
+        notify = on_status or (lambda event: None)
+        if LANGUAGES.get(language_id, {}).get("compile"):
+            notify({"stage": "compiling"})
+        try:
+            compile_error = await self._run(_compile_job, source_code, language_id)
+        except BrokenProcessPool as e:
+            compile_error = self._internal_error(e)
+        if compile_error is not None:
+            results = [{**compile_error, "token": str(uuid.uuid4())} for _ in stdins]
+            for i, result in enumerate(results):
+                notify({"stage": "case", "index": i, "result": result})
+            return results
+        notify({"stage": "running"})
+        return await super().execute_batch(source_code, language_id, stdins, on_status)
+
+    async def submit_code(self, source_code: str, language_id: int, stdin: str = "", on_done=None):
+        token = str(uuid.uuid4())
+        task = asyncio.create_task(self.execute_code(source_code, language_id, stdin))
+        if on_done:
+            task.add_done_callback(lambda _: on_done())
+        self._jobs[token] = task
+        while len(self._jobs) > 1000:
+            self._jobs.popitem(last=False)
+        return token
+
+    async def get_submission_result(self, token: str):
+        task = self._jobs.get(token)
+        if task is None:
+            return None
+        if not task.done():
+            return {"token": token, "status": status(2)}
+        return {**task.result(), "token": token}
@@ -1,11 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from judge_service import JudgeService
-from viva_logic import generate_viva_feedback
+from job_queue import SubmissionQueue, QueueFull, PRIORITY_RUN, PRIORITY_SUBMIT
+from problem_catalog import InvalidCursor, LIST_FIELDS
+from problem_store import ProblemStore
+from stress import StressCache
+import database_manager
+from viva_logic import generate_viva_feedback, stream_viva_feedback, get_providers
+import checker
+import complexity
+import asyncio
+import io
 import json
 import os
-import random
+import time
 
 app = FastAPI(title="Cognitive DSA Backend")
 
@@ -19,24 +29,70 @@ app.add_middleware(
 )
 
 judge = JudgeService()
+queue = SubmissionQueue.from_env()
+stress_cache = StressCache()
+# Accepted submissions are re-run on scaled inputs to measure their complexity (see complexity.py).
+COMPLEXITY_ANALYSIS = os.getenv("COMPLEXITY_ANALYSIS", "true").lower() == "true"
 
-# --- Load Problems Data ---
-PROBLEMS_DB = {}
-try:
-    with open("backend/data/striver_sheet.json", "r") as f:
-        problems = json.load(f)
-        for p in problems:
-            PROBLEMS_DB[p['slug']] = p
-    print(f"Loaded {len(PROBLEMS_DB)} problems.")
-except FileNotFoundError:
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Startup returns immediately so /problems and code runs are served right away;
+# the executor, the RAG stack (Chroma, MiniLM, indexes) and the LLM clients warm
+# up in the background. Anything used before it is warm initializes lazily.
+readiness = {"executor": "starting", "rag": "starting", "llm": "starting"}
+_warmup_tasks = []
+
+async def _warm_up(component: str, start):
+    started = asyncio.get_running_loop().time()
     try:
-        with open("data/striver_sheet.json", "r") as f:
-            problems = json.load(f)
-            for p in problems:
-                PROBLEMS_DB[p['slug']] = p
-        print(f"Loaded {len(PROBLEMS_DB)} problems.")
+        await start()
     except Exception as e:
-        print(f"Error loading problems: {e}")
+        readiness[component] = "failed"
+        print(f"[Startup] {component} warm-up failed: {e}")
+        return
+    readiness[component] = "ready"
+    print(f"[Startup] {component} ready in {asyncio.get_running_loop().time() - started:.2f}s")
+
+@app.on_event("startup")
+async def startup():
+    problem_store.start_watching()
+    _warmup_tasks.extend([
+        asyncio.create_task(_warm_up("executor", judge.start)),
+        asyncio.create_task(_warm_up("rag", lambda: asyncio.to_thread(database_manager.warm_up))),
+        asyncio.create_task(_warm_up("llm", lambda: asyncio.to_thread(get_providers))),
+    ])
+
+@app.on_event("shutdown")
+async def shutdown():
+    problem_store.stop_watching()
+    for task in _warmup_tasks:
+        task.cancel()
+    await judge.close()
+
+# --- Load Problems Data ---
+# Problems are served from an atomically swapped snapshot; the store's watcher
+# picks up edits to the problem file without a restart.
+problem_store = ProblemStore()
+problem_store.reload()
+
+def _reingest_problems(changed_files, changed_slugs, removed_slugs):
+    """Keeps the RAG knowledge base in step with edited problem files (only changed docs are re-embedded)."""
+    corpus = problem_store.snapshot.corpus
+    for path in changed_files:
+        if corpus is not None and path == corpus.index_path:
+            database_manager.load_data(path, records=corpus.iter_problems())
+        elif os.path.exists(path):
+            database_manager.load_data(path)
+        else:
+            database_manager.remove_source(path)
+
+problem_store.subscribe(_reingest_problems)
 
 # --- Request Models ---
 class CodeSubmission(BaseModel):
@@ -50,30 +106,185 @@ class VivaRequest(BaseModel):
     topic: str
     conversation_history: str = ""
 
+# --- Grading Helpers ---
+def _normalize_output(text) -> str:
+    """Trim trailing whitespace on every line and surrounding blank lines."""
+    return "\n".join(line.rstrip() for line in (text or "").strip().splitlines())
+
+def _outputs_match(actual, expected, options: dict = None) -> bool:
+    """
+    Exact match after normalization, tolerating spacing differences like `[0, 1]` vs `[0,1]`.
+    A case's "checker" options (float_tolerance, unordered) switch to the token checker.
+    """
+    if options:
+        return checker.compare(io.BytesIO((actual or "").encode()), io.BytesIO(expected.encode()), **options)[0]
+    a, e = _normalize_output(actual), _normalize_output(expected)
+    return a == e or "".join(a.split()) == "".join(e.split())
+
+def _grade_case(case_number: int, case: dict, result: dict) -> dict:
+    """Per-test-case verdict from a Judge0 result."""
+    status = result.get("status") or {}
+    if status.get("id") == 3:
+        expected = case.get("output")
+        # Hidden cases have no inline output; the executor already checked them.
+        matched = expected is None or _outputs_match(result.get("stdout"), expected, case.get("checker"))
+        verdict = "Accepted" if matched else "Wrong Answer"
+    else:
+        verdict = status.get("description") or result.get("error") or "Unknown Error"
+    return {
+        "case": case_number,
+        "verdict": verdict,
+        "input": case.get("input"),
+        "expected_output": case.get("output"),
+        "hidden": "input_ref" in case,
+        "stdout": result.get("stdout"),
+        "time": result.get("time"),
+        "memory": result.get("memory"),
+    }
+
 # --- Routes ---
 @app.get("/")
 async def root():
     return {"message": "Cognitive DSA Backend is running"}
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and the event loop is responsive."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 once problems and code execution can be served. RAG and LLM
+    warm-up is reported but doesn't gate readiness (viva requests made while
+    it is warming wait for it).
+    """
+    problems = len(problem_store.snapshot.problems)
+    ready = bool(problems) and readiness["executor"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": readiness, "problems": problems},
+    )
+
+def _json_with_etag(request: Request, body: bytes, etag: str) -> Response:
+    """Precomputed JSON body, or 304 if the client already has this version."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/problems")
-async def get_problems():
-    """Return list of all problems."""
-    return list(PROBLEMS_DB.values())
+async def get_problems(
+    request: Request,
+    topic: str = None,
+    difficulty: str = None,
+    pattern: str = None,
+    cursor: str = None,
+    limit: int = 50,
+    fields: str = None,
+):
+    """
+    One page of the problem list: {"items", "next_cursor", "total"}.
+    Filters by topic/difficulty/pattern; items carry the list-view fields unless
+    `fields` (comma-separated) asks for others. Pass next_cursor to get the next page.
+    """
+    try:
+        body, etag = problem_store.snapshot.catalog.page_json(
+            topic=topic, difficulty=difficulty, pattern=pattern, cursor=cursor, limit=limit,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _json_with_etag(request, body, etag)
+
+@app.get("/problems/facets")
+async def get_problem_facets():
+    """Distinct topics, difficulties and patterns with problem counts."""
+    return problem_store.snapshot.catalog.facets()
+
+@app.get("/problems/search")
+async def search_problems(q: str = "", topic: str = None, difficulty: str = None, pattern: str = None, limit: int = 20):
+    """
+    Full-text search over titles, descriptions and hints, tolerant of prefixes
+    and one-character typos. Returns ranked list-view items plus facet counts.
+    """
+    search_index = problem_store.snapshot.search
+    started = time.perf_counter()
+    results = search_index.search(
+        q, {"topic": topic, "difficulty": difficulty, "pattern": pattern}, max(1, min(limit, 100))
+    )
+    items = []
+    for slug, score in results["items"]:
+        problem = search_index.docs[slug]
+        items.append({**{f: problem[f] for f in LIST_FIELDS if f in problem}, "score": round(score, 4)})
+    return {
+        "items": items,
+        "total": results["total"],
+        "facets": results["facets"],
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
 
 @app.get("/problems/{slug}")
-async def get_problem_detail(slug: str):
+async def get_problem_detail(slug: str, request: Request):
     """Return detailed info for a specific problem."""
-    if slug not in PROBLEMS_DB:
+    detail = problem_store.snapshot.catalog.detail_json(slug)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Problem not found")
-    return PROBLEMS_DB[slug]
+    return _json_with_etag(request, *detail)
+
+def _user_key(request: Request) -> str:
+    """Identity used for per-user concurrency limits."""
+    return request.headers.get("X-User-Id") or (request.client.host if request.client else "anonymous")
 
 @app.post("/submit")
-async def submit_code(submission: CodeSubmission):
+async def submit_code(submission: CodeSubmission, request: Request):
     """
     Run or Submit code.
     Mode 'run': Returns execution output only.
     Mode 'submit': Returns full report with complexity analysis and score.
     """
+    return await _process_submission(submission, _user_key(request))
+
+@app.post("/submit/stream")
+async def submit_code_stream(submission: CodeSubmission, request: Request):
+    """
+    Same as /submit, but streams status transitions as server-sent events:
+    queued -> compiling -> running (case k/N) -> verdict (the /submit response).
+    """
+    events = asyncio.Queue()
+
+    async def process():
+        try:
+            report = await _process_submission(submission, _user_key(request), events.put_nowait)
+            events.put_nowait({"stage": "verdict", "report": report})
+        except QueueFull as e:
+            events.put_nowait({"stage": "error", "detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            print(f"Error streaming submission: {e}")
+            events.put_nowait({"stage": "error", "detail": "Execution failed"})
+
+    async def stream():
+        task = asyncio.create_task(process())
+        try:
+            while True:
+                event = await events.get()
+                yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+                if event["stage"] in ("verdict", "error"):
+                    break
+        finally:
+            # Client went away: cancelling also releases the queue slot
+            task.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _process_submission(submission: CodeSubmission, user: str, emit=None):
+    """Shared implementation of /submit and /submit/stream. emit(event) receives status updates."""
+    emit = emit or (lambda event: None)
+
     # 1. Basic Validation: Check for empty/default solution (Language specific)
     is_empty = False
     sc = submission.source_code
@@ -100,12 +311,13 @@ async def submit_code(submission: CodeSubmission):
             "editorial_snippet": "Try to solve it first!"
         }
 
-    # 2. Execute Code
-    result = judge.execute_code(submission.source_code, submission.language_id)
-    status_id = result.get("status", {}).get("id")
-    
     # Mode: RUN (Execution only)
     if submission.mode == "run":
+        emit({"stage": "queued", "position": queue.get_stats()["queued"]})
+        async with queue.slot(user, PRIORITY_RUN):
+            emit({"stage": "running", "case": 1, "total": 1})
+            result = await judge.execute_code(submission.source_code, submission.language_id)
+        status_id = result.get("status", {}).get("id")
         if status_id == 3: # Accepted / Success
              # Default mock time is 0.01, mock memory 1024
              return {
@@ -118,7 +330,7 @@ async def submit_code(submission: CodeSubmission):
         else:
              return {
                 "success": False,
-                "error": result.get("status", {}).get("description"),
+                "error": result.get("status", {}).get("description") or result.get("error"),
                 "compile_output": result.get("compile_output"),
                 "stderr": result.get("stderr"),
                 "stdout": result.get("stdout")
@@ -126,49 +338,147 @@ async def submit_code(submission: CodeSubmission):
 
     # Mode: SUBMIT (Full Report + Scoring)
     # 2. Lookup Problem Context
-    problem = PROBLEMS_DB.get(submission.problem_slug, {})
+    problem = problem_store.snapshot.get(submission.problem_slug) or {}
     expected_complexity = problem.get("complexity", "O(N)")
-    
-    # 3. Analyze Result & Generate Report
-    if status_id == 3: # Accepted
-        # Simulate slight variation for realism if using Mock Data
-        raw_runtime = float(result.get("time", 0.01))
-        if raw_runtime == 0: raw_runtime = 0.01
-        
-        raw_memory = float(result.get("memory", 1024))
-        
-        # Add slight jitter
-        runtime = round(raw_runtime * random.uniform(1.0, 5.0), 3)
-        memory = int(raw_memory * random.uniform(1.0, 1.2))
+
+    # 3. Grade every inline test case in one Judge0 batch, then the hidden (stored) ones
+    test_cases = problem.get("test_cases") or [{"input": "", "output": None}]
+    if not judge.supports_hidden_tests and any("input_ref" in case for case in test_cases):
+        # Grading only the samples would let a submission be Accepted without the hidden cases.
+        return {
+            "success": False,
+            "error": "Hidden tests unavailable: this problem can't be submitted on the configured execution backend.",
+            "hidden_tests_unavailable": True,
+            "compile_output": None,
+            "stderr": None,
+            "stdout": None,
+            "score": 0,
+            "complexity_analysis": "Use Run to check your code against the samples.",
+            "editorial_snippet": "Solve it first to see editorial."
+        }
+    inline = [i for i, case in enumerate(test_cases) if "input_ref" not in case]
+    hidden = [i for i, case in enumerate(test_cases) if "input_ref" in case]
+    results = [None] * len(test_cases)
+    finished = []
+
+    def finish(idx, result):
+        results[idx] = result
+        finished.append(idx)
+        case_report = _grade_case(idx + 1, test_cases[idx], result)
+        emit({"stage": "running", "case": len(finished), "total": len(test_cases), "result": case_report})
+
+    def on_status(event):
+        if event["stage"] != "case":
+            emit({"stage": event["stage"], "total": len(test_cases)})
+            return
+        finish(inline[event["index"]], event["result"])
+
+    emit({"stage": "queued", "position": queue.get_stats()["queued"]})
+    async with queue.slot(user, PRIORITY_SUBMIT):
+        if inline:
+            batch = await judge.execute_batch(
+                submission.source_code,
+                submission.language_id,
+                [test_cases[i].get("input", "") for i in inline],
+                on_status=on_status,
+            )
+            for idx, result in zip(inline, batch):
+                results[idx] = result
+        for idx in hidden:
+            finish(idx, await judge.execute_hidden(submission.source_code, submission.language_id, test_cases[idx]))
+    case_reports = [_grade_case(idx, case, result) for idx, (case, result) in enumerate(zip(test_cases, results), 1)]
+    passed = sum(1 for c in case_reports if c["verdict"] == "Accepted")
+    first_failure = next((r for c, r in zip(case_reports, results) if c["verdict"] != "Accepted"), None)
+
+    # 4. Analyze Result & Generate Report
+    if first_failure is None: # Accepted
+        runtime = round(max(float(r.get("time") or 0) for r in results), 3)
+        memory = int(max(float(r.get("memory") or 0) for r in results))
+
+        # 5. Estimate complexity empirically on scaled-up inputs
+        # (on generated stress cases when the problem has a generator and the backend
+        # can stream hidden tests, otherwise on the scaled sample input)
+        analysis = None
+        sample = next((c["input"] for c in test_cases if c.get("input")), None)
+        stress_cases = None
+        if COMPLEXITY_ANALYSIS and problem.get("stress") and judge.supports_hidden_tests:
+            emit({"stage": "analyzing", "sizes": len(complexity.SIZES)})
+            try:
+                stress_cases = await asyncio.gather(
+                    *(asyncio.to_thread(stress_cache.case, problem, n) for n in complexity.SIZES)
+                )
+            except (LookupError, ValueError, OSError) as e:
+                print(f"[Stress] Falling back to scaled samples for {submission.problem_slug}: {e}")
+        if stress_cases:
+            async with queue.slot(user, PRIORITY_SUBMIT):
+                analysis = await complexity.estimate_stress(
+                    judge, submission.source_code, submission.language_id, stress_cases, expected_complexity,
+                )
+        elif COMPLEXITY_ANALYSIS and sample:
+            emit({"stage": "analyzing", "sizes": len(complexity.SIZES)})
+            async with queue.slot(user, PRIORITY_SUBMIT):
+                analysis = await complexity.estimate(
+                    judge, submission.source_code, submission.language_id, sample,
+                    expected_complexity, seed=submission.problem_slug,
+                )
+        estimated = (analysis or {}).get("estimated", {}).get("time")
+        expected_time = (analysis or {}).get("expected", {}).get("time")
+        time_verdict = (analysis or {}).get("verdict", {}).get("time")
 
         # Calculate Score
-        score = 80 
+        score = 80
         if runtime > 0.1: score -= 5
         if runtime > 0.5: score -= 10
         if memory > 5000: score -= 5
-        score = min(100, max(50, score + random.randint(-2, 2)))
-        
+        if time_verdict is not None:
+            score += 10 if time_verdict <= 0 else -15
+        if stress_cases and analysis["failures"]:
+            score -= 10
+        score = min(100, max(50, score))
+
+        if estimated:
+            complexity_label = f"{estimated} (expected {expected_time or expected_complexity})"
+            complexity_analysis = (
+                f"Measured on {len(analysis['points'])} input sizes up to N={analysis['points'][-1]['n']}: "
+                f"time grows like {estimated}, memory like {analysis['estimated']['memory'] or 'unknown'}. "
+                f"Expected {expected_complexity}."
+            )
+        else:
+            complexity_label = expected_complexity
+            complexity_analysis = f"Your solution ran in {runtime}s. Expected complexity is {expected_complexity}."
+        if stress_cases and analysis["failures"]:
+            failed = ", ".join(f"N={f['n']} ({f['verdict']})" for f in analysis["failures"])
+            complexity_analysis += f" Stress tests failed at {failed}."
+
         report = {
             "success": True,
             "message": "Passed all test cases!",
             "runtime": f"{runtime}s",
             "memory": f"{memory}KB",
             "score": score,
-            "complexity_label": expected_complexity,
-            "complexity_analysis": f"Your solution ran in {runtime}s. Expected complexity is {expected_complexity}. Good job!",
+            "passed": passed,
+            "total": len(case_reports),
+            "test_results": case_reports,
+            "complexity_label": complexity_label,
+            "complexity_analysis": complexity_analysis,
+            "complexity": analysis,
             "editorial_snippet": problem.get("editorial", "Editorial not available.")
         }
         return report
         
-    else: # Failed / Compile Error
+    else: # Failed / Wrong Answer / Compile Error
+        failed_case = next(c for c in case_reports if c["verdict"] != "Accepted")
         return {
             "success": False,
-            "error": result.get("status", {}).get("description"),
-            "compile_output": result.get("compile_output"),
-            "stderr": result.get("stderr"),
-            "stdout": result.get("stdout"),
+            "error": failed_case["verdict"],
+            "compile_output": first_failure.get("compile_output"),
+            "stderr": first_failure.get("stderr"),
+            "stdout": first_failure.get("stdout"),
+            "passed": passed,
+            "total": len(case_reports),
+            "test_results": case_reports,
             "score": 0,
-            "complexity_analysis": "Execution failed. Please fix bugs and retry.",
+            "complexity_analysis": f"Passed {passed}/{len(case_reports)} test cases. Please fix bugs and retry.",
             "editorial_snippet": "Fix errors first to see editorial."
         }
 
@@ -180,25 +490,31 @@ class SimpleSubmission(BaseModel):
 
 @app.get("/api/v1/languages")
 async def get_languages():
-    return judge.get_languages()
+    return await judge.get_languages()
 
 @app.post("/api/v1/submissions/{language_id}")
-async def create_submission(language_id: int, submission: SimpleSubmission):
+async def create_submission(language_id: int, submission: SimpleSubmission, request: Request):
     """
     Submit code for compilation/execution.
     Returns: Token
     """
-    token = judge.submit_code(submission.source_code, language_id, submission.stdin)
+    # Admitted like every other execution (429 when the queue is full); the slot
+    # is held until the run finishes, which may be after the token is returned.
+    user = _user_key(request)
+    await queue.acquire(user, PRIORITY_SUBMIT)
+    token = await judge.submit_code(submission.source_code, language_id, submission.stdin,
+                                    on_done=lambda: queue.release(user))
     if not token:
         raise HTTPException(status_code=500, detail="Failed to submit code")
     return {"token": token}
 
 @app.post("/api/v1/submissions/{language_id}/run")
-async def run_submission(language_id: int, submission: SimpleSubmission):
+async def run_submission(language_id: int, submission: SimpleSubmission, request: Request):
     """
     Run code and wait for result (synchronous execution wrapper).
     """
-    result = judge.execute_code(submission.source_code, language_id, submission.stdin)
+    async with queue.slot(_user_key(request), PRIORITY_RUN):
+        result = await judge.execute_code(submission.source_code, language_id, submission.stdin)
     return result
 
 @app.get("/api/v1/submissions/{token}")
@@ -206,17 +522,110 @@ async def get_submission(token: str):
     """
     Get submission status/result by token.
     """
-    result = judge.get_submission_result(token)
+    result = await judge.get_submission_result(token)
     if result is None:
          raise HTTPException(status_code=404, detail="Submission not found")
     return result
 
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the execution result cache."""
+    return judge.cache.get_stats()
+
+@app.get("/api/v1/queue/stats")
+async def get_queue_stats():
+    """Queue depth and concurrency metrics of the execution queue."""
+    return queue.get_stats()
+
+@app.get("/api/v1/viva/cache/stats")
+async def get_viva_cache_stats():
+    """Hit/miss counters of the semantic viva response cache."""
+    return await asyncio.to_thread(database_manager.get_viva_cache_stats)
+
+@app.get("/api/v1/problems/stats")
+async def get_problem_store_stats():
+    """Problem store state: source, problem count, last reload and last rejected reload."""
+    return problem_store.get_stats()
+
+@app.get("/api/v1/problems/{slug}/stress")
+async def get_stress_case(slug: str, n: int):
+    """
+    Builds (or fetches from the stress cache) the generated test case of size n,
+    with the problem's own seed, and describes it. Only the sizes complexity
+    analysis uses are accepted, so clients can't fill the store with new cases;
+    like other hidden tests, the stored references are not returned. Other
+    sizes and seeds are built with `python stress.py`.
+    """
+    problem = problem_store.snapshot.get(slug)
+    if problem is None:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    if n not in complexity.SIZES:
+        raise HTTPException(status_code=400, detail=f"n must be one of {complexity.SIZES}")
+    try:
+        case = await asyncio.to_thread(stress_cache.case, problem, n)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"n": case["n"], "seed": case["seed"], "checker": case["checker"]}
+
+@app.get("/api/v1/llm/status")
+async def get_llm_status():
+    """Configured LLM providers and the state of their circuit breakers."""
+    providers = await asyncio.to_thread(get_providers)
+    return {"providers": providers.status(), "hedge_after": providers.hedge_after}
+
+@app.put("/api/v1/judge0/callback")
+async def judge0_callback(result: dict, secret: str = ""):
+    """
+    Webhook target for Judge0 `callback_url` (set JUDGE0_CALLBACK_URL to this route).
+    Resolves the pending execution waiting on the submission token. Every
+    callback_url carries a per-submission `secret`, checked against the token.
+    """
+    try:
+        resolved = judge.resolve_callback(result, secret)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if not resolved:
+        raise HTTPException(status_code=400, detail="Missing submission token")
+    return {"ok": True}
+
 @app.post("/viva")
 async def viva(request: VivaRequest):
     """RAG Loop: Retrieve -> Augment -> Generate a diagnostic question."""
-    feedback = generate_viva_feedback(
+    info = {}
+    feedback = await generate_viva_feedback(
         request.student_code,
         request.topic,
-        request.conversation_history
+        request.conversation_history,
+        info
+    )
+    return {"question": feedback, "cached": info["cached"]}
+
+@app.post("/viva/stream")
+async def viva_stream(request: VivaRequest):
+    """
+    Streaming /viva: relays the tutor reply as server-sent events while the LLM
+    generates it (`token` events), followed by a final `done` event carrying
+    the semantic cache-hit flag.
+    """
+    async def events():
+        info = {"cached": False}
+        try:
+            async for chunk in stream_viva_feedback(
+                request.student_code,
+                request.topic,
+                request.conversation_history,
+                info
+            ):
+                yield f"event: token\ndata: {json.dumps({'text': chunk})}\n\n"
+        except Exception as e:
+            print(f"[Viva Stream Error] {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Generation failed'})}\n\n"
+        yield f"event: done\ndata: {json.dumps({'cached': info['cached']})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"question": feedback}
@@ -0,0 +1,160 @@
+import json
+import base64
+import bisect
+import hashlib
+from collections import OrderedDict
+
+# Read side of the problem sheet for the list and detail routes. Problems are
+# kept sorted by id with secondary indexes by topic, difficulty and pattern;
+# pages are cursor-based (the cursor encodes the last id served) and projected
+# to the list-view fields by default. Serialized responses are precomputed per
+# problem (or served by `details`, e.g. a ProblemCorpus, when the catalog only
+# holds list-view metadata) and memoized per page, each with an ETag so clients
+# can revalidate with If-None-Match instead of downloading the sheet again.
+# Responses carry public_view() of each problem, never hidden test references.
+
+LIST_FIELDS = ("id", "slug", "title", "topic", "difficulty", "pattern", "complexity")
+FILTERS = ("topic", "difficulty", "pattern")
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+PAGE_CACHE_SIZE = 256
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _key(value) -> str:
+    return str(value).strip().lower()
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _is_hidden(case) -> bool:
+    return isinstance(case, dict) and any(key.endswith("_ref") for key in case)
+
+
+def public_view(problem: dict) -> dict:
+    """
+    The problem as served to clients. Hidden test cases (stored by reference in
+    the hidden test store) are left out; only inline examples are published.
+    """
+    cases = problem.get("test_cases")
+    if not cases or not any(_is_hidden(case) for case in cases):
+        return problem
+    return {**problem, "test_cases": [case for case in cases if not _is_hidden(case)]}
+
+
+def encode_cursor(last_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+class ProblemCatalog:
+    def __init__(self, problems: list, details=None):
+        self.problems = sorted(problems, key=lambda p: p["id"])
+        self.ids = [p["id"] for p in self.problems]
+        self.by_slug = {p["slug"]: p for p in self.problems}
+
+        # field -> normalized value -> positions into self.problems (ascending)
+        self.indexes = {field: {} for field in FILTERS}
+        for pos, problem in enumerate(self.problems):
+            for field in FILTERS:
+                if problem.get(field) is not None:
+                    self.indexes[field].setdefault(_key(problem[field]), []).append(pos)
+
+        if details is None:
+            bodies = {}
+            for problem in self.problems:
+                body = _dumps(public_view(problem))
+                bodies[problem["slug"]] = (body, _etag(body))
+            details = bodies.get
+        self._details = details  # slug -> (serialized problem, ETag) or None
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return len(self.problems)
+
+    def __contains__(self, slug):
+        return slug in self.by_slug
+
+    def get(self, slug: str):
+        return self.by_slug.get(slug)
+
+    def detail_json(self, slug: str):
+        """(serialized problem, ETag), or None."""
+        return self._details(slug)
+
+    def facets(self) -> dict:
+        """Distinct filter values with their problem counts."""
+        return {
+            field: {self.problems[positions[0]][field]: len(positions) for positions in index.values()}
+            for field, index in self.indexes.items()
+        }
+
+    def _positions(self, filters: dict) -> list:
+        """Ascending positions of problems matching every filter (all problems if none)."""
+        selected = None
+        for field, value in filters.items():
+            positions = self.indexes[field].get(_key(value), [])
+            if selected is None:
+                selected = positions
+            else:
+                wanted = set(positions)
+                selected = [pos for pos in selected if pos in wanted]
+        return list(range(len(self.problems))) if selected is None else selected
+
+    def query(self, topic: str = None, difficulty: str = None, pattern: str = None,
+              cursor: str = None, limit: int = DEFAULT_LIMIT, fields: list = None) -> dict:
+        """One page: {"items", "next_cursor", "total"} with items projected to `fields`."""
+        filters = {f: v for f, v in (("topic", topic), ("difficulty", difficulty), ("pattern", pattern)) if v}
+        positions = self._positions(filters)
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        start = 0
+        if cursor:
+            last_id = decode_cursor(cursor)
+            try:
+                start = bisect.bisect_right(positions, last_id, key=lambda pos: self.ids[pos])
+            except TypeError as e:
+                raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+        page = positions[start:start + limit]
+
+        fields = fields or LIST_FIELDS
+        items = []
+        for pos in page:
+            problem = public_view(self.problems[pos]) if "test_cases" in fields else self.problems[pos]
+            items.append({f: problem[f] for f in fields if f in problem})
+        has_more = start + limit < len(positions)
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(self.ids[page[-1]]) if has_more and page else None,
+            "total": len(positions),
+        }
+
+    def page_json(self, **params):
+        """(serialized page, ETag) for query(**params), memoized per distinct query."""
+        if params.get("fields"):
+            params["fields"] = tuple(params["fields"])
+        key = tuple(sorted(params.items()))
+        if key in self._pages:
+            self._pages.move_to_end(key)
+            return self._pages[key]
+        body = _dumps(self.query(**params))
+        entry = (body, _etag(body))
+        self._pages[key] = entry
+        while len(self._pages) > PAGE_CACHE_SIZE:
+            self._pages.popitem(last=False)
+        return entry
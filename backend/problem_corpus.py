@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import mmap
+import time
+import hashlib
+import argparse
+from problem_catalog import LIST_FIELDS, public_view
+
+# On-disk format for large problem banks. Problems are stored one compact JSON
+# record per line in JSONL shards; index.json holds, per problem, its shard,
+# byte offset, length, content hash and the lightweight list-view metadata.
+# Only the index stays resident: the full record (description, editorial,
+# test cases) is sliced out of a read-only mmap of its shard when a detail
+# page or a submission needs it, so mapped pages live in the shared page cache
+# rather than in each worker's heap.
+#
+#   python problem_corpus.py data/striver_sheet.json data/corpus --shard-size 1000
+#
+# then point PROBLEMS_PATH at data/corpus. Rebuilding writes new shards and
+# replaces index.json atomically; readers of the old index keep their mappings.
+
+INDEX_NAME = "index.json"
+SHARD_SIZE = int(os.getenv("PROBLEM_SHARD_SIZE", "1000"))
+
+
+def is_corpus(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, INDEX_NAME))
+
+
+def _serialize(problem: dict) -> bytes:
+    return json.dumps(problem, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ProblemCorpus:
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_NAME)
+        with open(self.index_path, "r") as f:
+            index = json.load(f)
+        self.shards = index["shards"]
+        self.entries = {entry["meta"]["slug"]: entry for entry in index["problems"]}
+        # Mapping reserves address space only; pages are read in on first access.
+        # Mapping every shard up front also keeps this corpus readable after a
+        # rebuild unlinks its shards.
+        self._maps = []
+        for name in self.shards:
+            with open(os.path.join(root, name), "rb") as f:
+                self._maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def metadata(self) -> list:
+        return [entry["meta"] for entry in self.entries.values()]
+
+    def raw(self, slug: str):
+        """The problem's serialized JSON record, or None."""
+        entry = self.entries.get(slug)
+        if entry is None:
+            return None
+        offset = entry["offset"]
+        return self._maps[entry["shard"]][offset:offset + entry["length"]]
+
+    def load(self, slug: str):
+        raw = self.raw(slug)
+        return json.loads(raw) if raw is not None else None
+
+    def detail_json(self, slug: str):
+        """
+        (serialized problem, ETag), or None. Records without hidden test cases are
+        served without parsing; the rest (and every record of an index built before
+        "hidden" was recorded) are re-serialized through public_view().
+        """
+        raw = self.raw(slug)
+        if raw is None:
+            return None
+        entry = self.entries[slug]
+        if entry.get("hidden", True):
+            body = _serialize(public_view(json.loads(raw)))
+            return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        return raw, f'"{entry["hash"]}"'
+
+    def iter_problems(self):
+        """Streams every full problem, one shard line at a time."""
+        for mapped in self._maps:
+            start = 0
+            while start < len(mapped):
+                end = mapped.find(b"\n", start)
+                end = len(mapped) if end == -1 else end
+                if end > start:
+                    yield json.loads(mapped[start:end])
+                start = end + 1
+
+
+def build(records, root: str, shard_size: int = SHARD_SIZE, validate=None) -> dict:
+    """
+    Writes `records` (any iterable of problems) as a corpus under `root`.
+    validate(problem, n), if given, may raise to abort the build before the
+    index is replaced. Returns {"problems", "shards"}.
+    """
+    os.makedirs(root, exist_ok=True)
+    stamp = f"{time.time_ns():x}"
+    shards, entries, slugs = [], [], set()
+    out = None
+    try:
+        for n, problem in enumerate(records):
+            if validate:
+                validate(problem, n)
+            if problem["slug"] in slugs:
+                raise ValueError(f"problem #{n}: duplicate slug {problem['slug']}")
+            slugs.add(problem["slug"])
+            if n % shard_size == 0:
+                if out:
+                    out.close()
+                shards.append(f"shard-{stamp}-{len(shards):04d}.jsonl")
+                out = open(os.path.join(root, shards[-1]), "wb")
+            line = _serialize(problem)
+            entries.append({
+                "shard": len(shards) - 1,
+                "offset": out.tell(),
+                "length": len(line),
+                "hash": hashlib.sha256(line).hexdigest()[:32],
+                "meta": {f: problem[f] for f in LIST_FIELDS if f in problem},
+                "hidden": public_view(problem) is not problem,
+            })
+            out.write(line + b"\n")
+    except BaseException:
+        if out:
+            out.close()
+        for name in shards:
+            os.remove(os.path.join(root, name))
+        raise
+    if out:
+        out.close()
+
+    tmp_path = os.path.join(root, INDEX_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"shards": shards, "problems": entries}, f, separators=(",", ":"))
+    os.replace(tmp_path, os.path.join(root, INDEX_NAME))
+
+    # Shards of the previous build: unlinked files stay readable for open mappings.
+    for name in os.listdir(root):
+        if name.startswith("shard-") and name not in shards:
+            os.remove(os.path.join(root, name))
+    return {"problems": len(entries), "shards": len(shards)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a sharded problem corpus from a JSON/JSONL problem file.")
+    parser.add_argument("source", help="JSON array or JSONL file of problems")
+    parser.add_argument("root", help="corpus directory (point PROBLEMS_PATH here)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    args = parser.parse_args()
+
+    from bulk_ingest import iter_records
+    from problem_store import validate_problem
+
+    if not os.path.exists(args.source):
+        print(f"Error: {args.source} not found.")
+        sys.exit(1)
+    print(build(iter_records(args.source), args.root, args.shard_size, validate=validate_problem))
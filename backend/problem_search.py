@@ -0,0 +1,236 @@
+import json
+import math
+import heapq
+import bisect
+import hashlib
+from collections import Counter
+from operator import itemgetter
+from keyword_index import tokenize
+from problem_catalog import LIST_FIELDS
+
+# Full-text search over the problem sheet. An inverted index maps terms from the
+# title, slug, topic, pattern, description and hints (weighted in that order of
+# importance) to problems. Every query term must match, either exactly, as a
+# prefix (the last term, for search-as-you-type) or within one edit (typos,
+# via a deletion index over the vocabulary). Results are ranked by field-weighted
+# tf-idf and come with facet counts. update() re-indexes only problems whose
+# content changed, so reloading the problem file is incremental. Only the
+# list-view fields of each problem are retained; the full text is indexed and
+# dropped, so problems can be streamed in from a large corpus.
+
+FIELD_WEIGHTS = {"title": 4.0, "slug": 3.0, "topic": 2.0, "pattern": 2.0, "description": 1.0, "hints": 0.5}
+FACETS = ("topic", "difficulty", "pattern")
+PREFIX_EXPANSIONS = 16
+PREFIX_PENALTY = 0.8
+TYPO_PENALTY = 0.6
+MIN_TYPO_LENGTH = 4
+
+
+def _deletes(term: str) -> set:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1, or a single adjacent transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1
+                                  and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _content_hash(problem: dict) -> str:
+    return hashlib.sha256(json.dumps(problem, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ProblemSearchIndex:
+    def __init__(self, problems: list = ()):
+        self.postings = {}      # term -> {slug: weighted term frequency}
+        self.doc_terms = {}     # slug -> set of terms
+        self.docs = {}          # slug -> list-view fields of the problem
+        self.hashes = {}        # slug -> content hash
+        self.vocabulary = []    # sorted terms, for prefix ranges
+        self.delete_index = {}  # one-character deletion of a term -> terms
+        self.facet_values = {}  # slug -> facet values, in FACETS order
+        self._scored = {}       # term -> {slug: idf-weighted score}, reset on update
+        self.update(problems)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def clone(self):
+        """
+        Copy that can be updated without disturbing readers of this one (sets
+        in doc_terms and the vocabulary list are replaced, never mutated).
+        """
+        other = ProblemSearchIndex.__new__(ProblemSearchIndex)
+        other.postings = {term: dict(docs) for term, docs in self.postings.items()}
+        other.doc_terms = dict(self.doc_terms)
+        other.docs = dict(self.docs)
+        other.hashes = dict(self.hashes)
+        other.vocabulary = self.vocabulary
+        other.delete_index = {variant: set(terms) for variant, terms in self.delete_index.items()}
+        other.facet_values = dict(self.facet_values)
+        other._scored = dict(self._scored)
+        return other
+
+    def _fields(self, problem: dict):
+        for field, weight in FIELD_WEIGHTS.items():
+            value = problem.get(field)
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            if value:
+                yield weight, str(value)
+
+    def _add(self, slug: str, problem: dict, new_terms: set):
+        weights = {}
+        for weight, text in self._fields(problem):
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + weight
+        for term, weight in weights.items():
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                new_terms.add(term)
+            docs[slug] = weight
+        self.doc_terms[slug] = set(weights)
+        self.docs[slug] = {f: problem[f] for f in LIST_FIELDS if f in problem}
+        self.facet_values[slug] = tuple(problem.get(field) for field in FACETS)
+
+    def _remove(self, slug: str, gone_terms: set):
+        for term in self.doc_terms.pop(slug, ()):
+            docs = self.postings[term]
+            del docs[slug]
+            if not docs:
+                del self.postings[term]
+                gone_terms.add(term)
+        self.docs.pop(slug, None)
+        self.hashes.pop(slug, None)
+        self.facet_values.pop(slug, None)
+
+    def update(self, problems) -> dict:
+        """
+        Re-indexes the problems that were added, changed or removed since the
+        last update. `problems` is any iterable of the complete problem set and
+        is consumed once.
+        """
+        seen, new_terms, gone_terms = set(), set(), set()
+        counts = {"added": 0, "updated": 0, "removed": 0}
+
+        for problem in problems:
+            slug = problem["slug"]
+            seen.add(slug)
+            content_hash = _content_hash(problem)
+            if self.hashes.get(slug) == content_hash:
+                continue
+            counts["updated" if slug in self.docs else "added"] += 1
+            self._remove(slug, gone_terms)
+            self._add(slug, problem, new_terms)
+            self.hashes[slug] = content_hash
+        for slug in [s for s in self.docs if s not in seen]:
+            self._remove(slug, gone_terms)
+            counts["removed"] += 1
+
+        if any(counts.values()):
+            self._scored = {}  # idf depends on the number of problems
+
+        # A term can be dropped by one problem and re-added by another in the same update.
+        gone_terms -= set(self.postings)
+        new_terms -= gone_terms
+        if new_terms or gone_terms:
+            self.vocabulary = sorted(self.postings)
+            for term in gone_terms:
+                for variant in _deletes(term) if len(term) >= MIN_TYPO_LENGTH else ():
+                    bucket = self.delete_index.get(variant)
+                    if bucket:
+                        bucket.discard(term)
+                        if not bucket:
+                            del self.delete_index[variant]
+            for term in new_terms:
+                for variant in _deletes(term) if len(term) >= MIN_TYPO_LENGTH else ():
+                    self.delete_index.setdefault(variant, set()).add(term)
+        return counts
+
+    def _expand(self, token: str, prefix: bool) -> dict:
+        """Vocabulary terms matching a query token -> score multiplier."""
+        matches = {}
+        if token in self.postings:
+            matches[token] = 1.0
+        if prefix:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for term in self.vocabulary[start:start + PREFIX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_PENALTY)
+        if not matches and len(token) >= MIN_TYPO_LENGTH:
+            candidates = set(self.delete_index.get(token, ()))
+            for variant in _deletes(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.delete_index.get(variant, ()))
+            for term in candidates:
+                if _within_one_edit(token, term):
+                    matches[term] = TYPO_PENALTY
+        return matches
+
+    def _term_scores(self, term: str) -> dict:
+        scored = self._scored.get(term)
+        if scored is None:
+            docs = self.postings[term]
+            idf = math.log(1 + len(self.docs) / len(docs))
+            scored = self._scored[term] = {slug: idf * weight / (weight + 1.0) for slug, weight in docs.items()}
+        return scored
+
+    def search(self, query: str, filters: dict = None, limit: int = 20) -> dict:
+        """
+        {"items": [(slug, score), ...], "total", "facets"}. Facet counts cover all
+        text matches; `filters` (topic/difficulty/pattern) narrow the items.
+        """
+        tokens = tokenize(query)
+        scores = None
+        for i, token in enumerate(tokens):
+            expansions = self._expand(token, prefix=i == len(tokens) - 1)
+            if len(expansions) == 1 and 1.0 in expansions.values():
+                term_scores = self._term_scores(token)  # shared, read-only
+            else:
+                term_scores = {}
+                for term, multiplier in expansions.items():
+                    for slug, score in self._term_scores(term).items():
+                        score *= multiplier
+                        if score > term_scores.get(slug, 0.0):
+                            term_scores[slug] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                small, large = (scores, term_scores) if len(scores) <= len(term_scores) else (term_scores, scores)
+                scores = {slug: s + large[slug] for slug, s in small.items() if slug in large}
+            if not scores:
+                break
+        if scores is None:  # empty query: everything matches
+            scores = dict.fromkeys(self.docs, 0.0)
+
+        facets = {}
+        for i, field in enumerate(FACETS):
+            counts = Counter(self.facet_values[slug][i] for slug in scores)
+            counts.pop(None, None)
+            facets[field] = dict(counts)
+
+        wanted = [(i, str(filters[f]).lower()) for i, f in enumerate(FACETS) if (filters or {}).get(f)]
+        if wanted:
+            matching = [
+                (slug, score) for slug, score in scores.items()
+                if all(str(self.facet_values[slug][i]).lower() == v for i, v in wanted)
+            ]
+        else:
+            matching = scores.items()
+        top = heapq.nlargest(limit, matching, key=itemgetter(1))
+        return {"items": top, "total": len(matching), "facets": facets}
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from problem_catalog import ProblemCatalog
+from problem_search import ProblemSearchIndex
+from problem_corpus import INDEX_NAME, ProblemCorpus, is_corpus
+
+# Hot-reloadable problem sheet. The store serves an immutable snapshot (problems
+# by slug, list catalog, search index); a watcher thread polls the problem file,
+# or every *.json file in a problem directory, and when something changes it
+# parses and validates the new data off the request path, builds a new snapshot
+# and swaps it in with a single assignment. Readers grab `store.snapshot` once
+# and never wait on a reload. Invalid data is rejected and the old snapshot kept.
+#
+# PROBLEMS_PATH may also be a sharded corpus (see problem_corpus); then only its
+# index is watched, the snapshot keeps list-view metadata resident and full
+# problems are read from the memory-mapped shards on demand.
+
+PROBLEMS_PATH = os.getenv(
+    "PROBLEMS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "striver_sheet.json")
+)
+WATCH_INTERVAL = float(os.getenv("PROBLEMS_WATCH_INTERVAL", "1.0"))
+
+REQUIRED_FIELDS = {"id": int, "slug": str, "title": str, "topic": str, "difficulty": str, "description": str}
+METADATA_FIELDS = {f: kind for f, kind in REQUIRED_FIELDS.items() if f != "description"}
+
+
+class InvalidProblemData(ValueError):
+    pass
+
+
+def validate_problem(problem, n: int, required: dict = REQUIRED_FIELDS):
+    if not isinstance(problem, dict):
+        raise InvalidProblemData(f"problem #{n} is not an object")
+    for field, kind in required.items():
+        if not isinstance(problem.get(field), kind):
+            raise InvalidProblemData(f"problem #{n}: '{field}' must be {kind.__name__}")
+    for case in problem.get("test_cases", []):
+        # Inline ({"input", "output"}) or stored in the hidden test store ({"input_ref", "output_ref"}).
+        if not isinstance(case, dict) or not ("input" in case or {"input_ref", "output_ref"} <= case.keys()):
+            raise InvalidProblemData(f"problem '{problem['slug']}': malformed test case")
+
+
+def validate(problems, required: dict = REQUIRED_FIELDS) -> list:
+    """Checks the shape the routes and grader rely on; raises InvalidProblemData."""
+    if not isinstance(problems, list):
+        raise InvalidProblemData("problem data must be a JSON array")
+    ids, slugs = set(), set()
+    for n, problem in enumerate(problems):
+        validate_problem(problem, n, required)
+        if problem["slug"] in slugs or problem["id"] in ids:
+            raise InvalidProblemData(f"problem #{n}: duplicate slug or id ({problem['slug']}, {problem['id']})")
+        slugs.add(problem["slug"])
+        ids.add(problem["id"])
+    return problems
+
+
+class ProblemSnapshot:
+    def __init__(self, problems: list, search: ProblemSearchIndex, version: dict, corpus: ProblemCorpus = None):
+        # Full problems, or only their list-view metadata when backed by a corpus.
+        self.problems = {p["slug"]: p for p in problems}
+        self.corpus = corpus
+        self.catalog = ProblemCatalog(problems, details=corpus.detail_json if corpus else None)
+        self.search = search
+        self.version = version  # source file -> (mtime_ns, size)
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.problems)
+
+    def get(self, slug: str):
+        """The full problem (description, test cases, ...), or None."""
+        if self.corpus is not None:
+            return self.corpus.load(slug)
+        return self.problems.get(slug)
+
+
+class ProblemStore:
+    def __init__(self, path: str = PROBLEMS_PATH, interval: float = WATCH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.snapshot = ProblemSnapshot([], ProblemSearchIndex(), {})
+        self.last_error = None
+        self._rejected = None  # version of the last invalid data, not retried until it changes
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._reload_lock = threading.Lock()
+        # Listeners (e.g. Chroma re-ingestion) run in order on their own thread so
+        # slow ones don't hold up the next swap.
+        self._notifier = ThreadPoolExecutor(max_workers=1, thread_name_prefix="problem-store-sync")
+
+    def _files(self) -> list:
+        if is_corpus(self.path):
+            return [os.path.join(self.path, INDEX_NAME)]  # replaced last when the corpus is rebuilt
+        if os.path.isdir(self.path):
+            return sorted(
+                os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".json")
+            )
+        return [self.path]
+
+    def _fingerprint(self) -> dict:
+        version = {}
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            version[path] = (stat.st_mtime_ns, stat.st_size)
+        return version
+
+    def subscribe(self, listener):
+        """
+        listener(changed_files, changed_slugs, removed_slugs) runs after a swap that
+        changed problems (not on the initial load). changed_files includes deleted files.
+        """
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Reloads if any source file changed. Returns True if a new snapshot was swapped in."""
+        with self._reload_lock:
+            old = self.snapshot
+            version = self._fingerprint()
+            if (version == old.version or version == self._rejected) and not force:
+                return False
+            corpus = None
+            try:
+                if is_corpus(self.path):
+                    # Shards were validated when the corpus was built.
+                    corpus = ProblemCorpus(self.path)
+                    problems = validate(corpus.metadata(), METADATA_FIELDS)
+                else:
+                    problems = []
+                    for path in version:
+                        with open(path, "r") as f:
+                            problems.extend(json.load(f))
+                    validate(problems)
+                search = old.search.clone()
+                changes = search.update(corpus.iter_problems() if corpus else problems)
+            except (OSError, KeyError, ValueError) as e:
+                # Also covers a file caught half-written; the next poll retries.
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._rejected = version
+                print(f"[Problem Store] Keeping previous problems, reload failed: {self.last_error}")
+                return False
+
+            new = ProblemSnapshot(problems, search, version, corpus)
+            self.snapshot = new  # atomic swap
+            self.last_error = None
+
+        changed = [s for s, h in new.search.hashes.items() if old.search.hashes.get(s) != h]
+        removed = [s for s in old.problems if s not in new.problems]
+        changed_files = [path for path in {**old.version, **version} if old.version.get(path) != version.get(path)]
+        print(f"[Problem Store] Loaded {len(new.problems)} problems. Search index: {changes}")
+        if old.version and (changed or removed):
+            for listener in self._listeners:
+                self._notifier.submit(self._notify, listener, changed_files, changed, removed)
+        return True
+
+    @staticmethod
+    def _notify(listener, changed_files, changed, removed):
+        try:
+            listener(changed_files, changed, removed)
+        except Exception as e:
+            print(f"[Problem Store] Reload listener failed: {e}")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"[Problem Store] Watcher error: {e}")
+
+    def start_watching(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="problem-store-watcher", daemon=True)
+            self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        self._notifier.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "path": self.path,
+            "problems": len(snapshot.problems),
+            "files": len(snapshot.version),
+            "corpus_shards": len(snapshot.corpus.shards) if snapshot.corpus else None,
+            "loaded_at": snapshot.loaded_at,
+            "watching": self._thread is not None,
+            "last_error": self.last_error,
+        }
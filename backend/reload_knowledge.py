@@ -1,4 +1,4 @@
-from database_manager import load_data, collection
+from database_manager import load_data, get_collection
 
 if __name__ == "__main__":
     print("--- Reloading Knowledge Base ---")
@@ -11,5 +11,5 @@ if __name__ == "__main__":
     print("\n[2/2] Loading Striver Sheet Problems...")
     load_data("data/striver_sheet.json")
     
-    print(f"\nTotal documents in Knowledge Base: {collection.count()}")
+    print(f"\nTotal documents in Knowledge Base: {get_collection().count()}")
     print("--- Done ---")
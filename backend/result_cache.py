@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import hashlib
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Verdicts that are a pure function of (source, language, stdin) and safe to reuse.
+# 3 = Accepted, 6 = Compilation Error. TLE / runtime errors can be flaky, so they are not cached.
+CACHEABLE_STATUS_IDS = {3, 6}
+
+
+def normalize_source(source_code: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic edits still hit the cache."""
+    lines = source_code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def make_key(source_code: str, language_id: int, stdin: str = "") -> str:
+    """Content-addressed key: sha256 over normalized source, language and stdin."""
+    digest = hashlib.sha256()
+    for part in (normalize_source(source_code), str(language_id), stdin or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier execution result cache.
+    Tier 1: in-memory LRU with TTL. Tier 2 (optional): SQLite file that survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, db_path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, expires_at REAL, result TEXT)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    async def get(self, key: str):
+        """Returns the cached result or None. The SQLite tier is read in a worker thread."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+        if self.db_path:
+            row = await asyncio.to_thread(self._load, key)
+            if row and row[0] > now:
+                result = json.loads(row[1])
+                self._remember(key, row[0], result)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return result
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, result: dict):
+        """Stores a result if its verdict is deterministic. The SQLite tier is written in a worker thread."""
+        if not result or result.get("status", {}).get("id") not in CACHEABLE_STATUS_IDS:
+            return
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, result)
+        with self._lock:
+            self.stats["stores"] += 1
+
+        if self.db_path:
+            await asyncio.to_thread(self._store, key, expires_at, json.dumps(result))
+
+    def _load(self, key):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT expires_at, result FROM results WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _store(self, key, expires_at, payload):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, expires_at, result) VALUES (?, ?, ?)",
+                (key, expires_at, payload),
+            )
+            conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, key, expires_at, result):
+        with self._lock:
+            self._memory[key] = (expires_at, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._memory),
+                "hit_rate": round((self.stats["hits"] + self.stats["disk_hits"]) / lookups, 3) if lookups else 0.0,
+                "persistent": bool(self.db_path),
+            }
+
+
+def from_env() -> ResultCache:
+    """Builds the cache from RESULT_CACHE_* environment variables."""
+    return ResultCache(
+        max_entries=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+        db_path=os.getenv("RESULT_CACHE_DB") or None,
+    )
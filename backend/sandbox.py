@@ -0,0 +1,471 @@
+import os
+import sys
+import json
+import stat
+import time
+import shutil
+import signal
+import ctypes
+import struct
+import platform
+import resource
+import tempfile
+import subprocess
+
+try:
+    import seccomp  # libseccomp bindings (optional)
+except ImportError:
+    seccomp = None
+
+# Process-level sandbox shared by the local executor and its warm pools.
+
+# --- Limits ---
+CPU_LIMIT = float(os.getenv("LOCAL_CPU_LIMIT", "2"))          # seconds of CPU per run
+WALL_LIMIT = float(os.getenv("LOCAL_WALL_LIMIT", "5"))        # seconds of wall clock per run
+COMPILE_LIMIT = float(os.getenv("LOCAL_COMPILE_LIMIT", "15")) # seconds of wall clock per compile
+MEMORY_LIMIT_KB = int(os.getenv("LOCAL_MEMORY_LIMIT_KB", "262144"))
+OUTPUT_LIMIT_KB = int(os.getenv("LOCAL_OUTPUT_LIMIT_KB", "1024"))
+
+# --- Isolation ---
+# Children run as their own uid (when the server runs as root) in a private mount
+# namespace whose root is a small tmpfs holding the system directories
+# (read-only) and their own working directory, so server files, the hidden test
+# store and the shared compile cache are out of reach. Set LOCAL_SANDBOX_STRICT=1
+# to refuse to start when any of this is unavailable instead of logging it.
+SANDBOX_UID = int(os.getenv("LOCAL_SANDBOX_UID", "65534"))
+SANDBOX_GID = int(os.getenv("LOCAL_SANDBOX_GID", "65534"))
+SANDBOX_STRICT = os.getenv("LOCAL_SANDBOX_STRICT", "0") == "1"
+RUN_DIR = os.getenv("LOCAL_RUN_DIR", os.path.join(tempfile.gettempdir(), "dsa_runs"))
+_ROOT_MOUNT = os.path.join(tempfile.gettempdir(), "dsa_sandbox_root")
+SYSTEM_PATHS = (
+    "/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/libx32", "/etc", "/proc",
+    "/dev/null", "/dev/zero", "/dev/random", "/dev/urandom",
+    sys.base_prefix, sys.prefix,  # interpreters installed outside /usr (pyenv, venvs)
+)
+
+_CLONE_NEWNS = 0x00020000
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWNET = 0x40000000
+_MS_RDONLY, _MS_NOSUID, _MS_NODEV, _MS_NOEXEC = 1, 2, 4, 8
+_MS_REMOUNT = 32
+_MS_BIND = 4096
+_MS_REC = 16384
+_MS_PRIVATE = 1 << 18
+_MNT_DETACH = 2
+
+_PR_SET_NO_NEW_PRIVS = 38
+_PR_CAPBSET_DROP = 24
+_PR_CAP_AMBIENT, _PR_CAP_AMBIENT_CLEAR_ALL = 47, 4
+_PR_SET_SECCOMP, _SECCOMP_MODE_FILTER = 22, 2
+_CAPABILITY_VERSION_3 = 0x20080522
+
+# Syscalls denied to submissions. Without the libseccomp bindings the same list
+# is loaded as a raw BPF filter, so only the syscall numbers are per-architecture.
+DENIED_SYSCALLS = ("socket", "connect", "bind", "listen", "accept", "accept4",
+                   "ptrace", "mount", "umount2", "setns", "unshare", "chroot", "pivot_root",
+                   "reboot", "kexec_load")
+_SYSCALLS = {
+    "x86_64": {
+        "audit_arch": 0xC000003E,
+        "socket": 41, "connect": 42, "accept": 43, "bind": 49, "listen": 50, "accept4": 288,
+        "ptrace": 101, "mount": 165, "umount2": 166, "setns": 308, "unshare": 272, "chroot": 161,
+        "pivot_root": 155, "reboot": 169, "kexec_load": 246,
+    },
+    "aarch64": {
+        "audit_arch": 0xC00000B7,
+        "socket": 198, "connect": 203, "accept": 202, "bind": 200, "listen": 201, "accept4": 242,
+        "ptrace": 117, "mount": 40, "umount2": 39, "setns": 268, "unshare": 97, "chroot": 51,
+        "pivot_root": 41, "reboot": 142, "kexec_load": 104,
+    },
+}
+
+_SIGNAL_STATUS = {
+    signal.SIGSEGV: 7,
+    signal.SIGXFSZ: 8,
+    signal.SIGFPE: 9,
+    signal.SIGABRT: 10,
+}
+
+
+def make_workdir(prefix: str, parent: str = None) -> str:
+    """A fresh directory under `parent` (default RUN_DIR) that sandboxed children may write to."""
+    os.makedirs(RUN_DIR, mode=0o711, exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix=prefix, dir=parent or RUN_DIR)
+    if os.geteuid() == 0:
+        os.chown(workdir, SANDBOX_UID, SANDBOX_GID)
+    return workdir
+
+
+# --- Sandbox (runs in the forked child before exec) ---
+def _libc():
+    try:
+        return ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+
+
+def _mount(source, target, fstype, flags, data=None):
+    libc = _libc()
+    encode = lambda value: value.encode() if value is not None else None
+    if libc is None or libc.mount(encode(source), encode(target), encode(fstype), flags, encode(data)) != 0:
+        errno = ctypes.get_errno() if libc is not None else 0
+        raise OSError(errno, f"mount {target}: {os.strerror(errno)}")
+
+
+def _write(path: str, text: str):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _enter_namespaces(privileged: bool) -> bool:
+    """
+    Moves into fresh mount and network namespaces (via a user namespace when not
+    root). Returns False if only the network, or nothing, could be isolated.
+    """
+    libc = _libc()
+    if libc is None:
+        return False
+    if privileged:
+        if libc.unshare(_CLONE_NEWNS | _CLONE_NEWNET) == 0:
+            return True
+    else:
+        uid, gid = os.getuid(), os.getgid()
+        if libc.unshare(_CLONE_NEWUSER | _CLONE_NEWNS | _CLONE_NEWNET) == 0:
+            _write("/proc/self/setgroups", "deny")
+            _write("/proc/self/uid_map", f"0 {uid} 1")
+            _write("/proc/self/gid_map", f"0 {gid} 1")
+            return True
+    for flags in (_CLONE_NEWUSER | _CLONE_NEWNET, _CLONE_NEWNET):
+        if libc.unshare(flags) == 0:
+            break
+    return False
+
+
+def _bind(path: str, writable: bool):
+    """Makes `path` visible at the same place inside the new root."""
+    if not os.path.lexists(path):
+        return
+    target = _ROOT_MOUNT + os.path.abspath(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.islink(path):
+        if not os.path.lexists(target):
+            os.symlink(os.readlink(path), target)
+        return
+    if os.path.isdir(path):
+        os.makedirs(target, exist_ok=True)
+    elif not os.path.exists(target):
+        open(target, "a").close()
+    _mount(path, target, None, _MS_BIND | _MS_REC)
+    if not writable:
+        # Flags already set on the source mount must be kept, or the remount is refused.
+        kept = os.statvfs(target).f_flag & (_MS_NOSUID | _MS_NODEV | _MS_NOEXEC)
+        _mount(None, target, None, _MS_BIND | _MS_REMOUNT | _MS_RDONLY | kept)
+
+
+def _pivot_root(new_root: str):
+    """
+    Makes `new_root` the root and detaches the old one. Unlike chroot this leaves
+    no path back to the host filesystem, even for a process that can still chroot.
+    """
+    libc = _libc()
+    old_root = os.path.join(new_root, ".old_root")
+    os.mkdir(old_root)
+    if libc.syscall(_SYSCALLS[platform.machine()]["pivot_root"], new_root.encode(), old_root.encode()) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"pivot_root: {os.strerror(errno)}")
+    os.chdir("/")
+    if libc.umount2(b"/.old_root", _MNT_DETACH) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"umount old root: {os.strerror(errno)}")
+    os.rmdir("/.old_root")
+
+
+def _isolate_filesystem(writable: tuple, readonly: tuple):
+    """Pivots into a tmpfs holding only the system paths, `readonly` and `writable`."""
+    cwd = os.getcwd()
+    _mount(None, "/", None, _MS_REC | _MS_PRIVATE)
+    _mount("tmpfs", _ROOT_MOUNT, "tmpfs", _MS_NOSUID | _MS_NODEV, "size=16m,mode=0755")
+    for path in dict.fromkeys(SYSTEM_PATHS + tuple(readonly)):
+        _bind(path, writable=False)
+    for path in writable:
+        _bind(path, writable=True)
+    tmp = os.path.join(_ROOT_MOUNT, "tmp")
+    os.makedirs(tmp, exist_ok=True)
+    os.chmod(tmp, 0o1777)
+    _pivot_root(_ROOT_MOUNT)
+    os.chdir(cwd)
+
+
+def _drop_privileges():
+    os.setgroups([])
+    os.setgid(SANDBOX_GID)
+    os.setuid(SANDBOX_UID)
+
+
+def _drop_capabilities(privileged: bool):
+    """
+    Empties the bounding, ambient, permitted, effective and inheritable sets, so
+    the child can't regain capabilities through exec (it may be uid 0 inside its
+    user namespace), and switches to the sandbox uid when running as root.
+    """
+    libc = _libc()
+    with open("/proc/sys/kernel/cap_last_cap") as f:
+        last_cap = int(f.read())
+    held = _effective_capabilities()
+    for cap in range(last_cap + 1):
+        if libc.prctl(_PR_CAPBSET_DROP, cap, 0, 0, 0) != 0 and held:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"dropping capability {cap}: {os.strerror(errno)}")
+    libc.prctl(_PR_CAP_AMBIENT, _PR_CAP_AMBIENT_CLEAR_ALL, 0, 0, 0)
+    if privileged:
+        _drop_privileges()
+    header = ctypes.create_string_buffer(struct.pack("Ii", _CAPABILITY_VERSION_3, 0))
+    data = ctypes.create_string_buffer(bytes(24))
+    if libc.capset(header, data) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"capset: {os.strerror(errno)}")
+    if libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"no_new_privs: {os.strerror(errno)}")
+
+
+def _effective_capabilities() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("CapEff:"):
+                return int(line.split()[1], 16)
+    return 0
+
+
+def _seccomp_program(arch: dict) -> bytes:
+    """Classic BPF: EPERM for DENIED_SYSCALLS (and x32 or foreign-arch calls), allow the rest."""
+    ld, jeq, jge, ret = 0x20, 0x15, 0x35, 0x06
+    allow, eperm = 0x7FFF0000, 0x00050000 | 1
+    insn = lambda code, jt, jf, k: struct.pack("HBBI", code, jt, jf, k)
+    denied = [arch[name] for name in DENIED_SYSCALLS]
+    program = [
+        insn(ld, 0, 0, 4),                                   # seccomp_data.arch
+        insn(jeq, 1, 0, arch["audit_arch"]),
+        insn(ret, 0, 0, eperm),
+        insn(ld, 0, 0, 0),                                   # seccomp_data.nr
+        insn(jge, len(denied) + 1, 0, 0x40000000),           # x32 ABI
+    ]
+    for i, nr in enumerate(denied):
+        program.append(insn(jeq, len(denied) - i, 0, nr))
+    program += [insn(ret, 0, 0, allow), insn(ret, 0, 0, eperm)]
+    return b"".join(program)
+
+
+def _install_seccomp() -> bool:
+    """Deny networking, tracing, mount and namespace syscalls. Returns False if no filter was loaded."""
+    if seccomp is not None:
+        try:
+            f = seccomp.SyscallFilter(defaction=seccomp.ALLOW)
+            for name in DENIED_SYSCALLS:
+                f.add_rule(seccomp.ERRNO(1), name)
+            f.load()
+            return True
+        except Exception:
+            return False
+    arch = _SYSCALLS.get(platform.machine())
+    libc = _libc()
+    if arch is None or libc is None:
+        return False
+    program = _seccomp_program(arch)
+    filters = ctypes.create_string_buffer(program)
+    fprog = struct.pack("HxxxxxxP", len(program) // 8, ctypes.addressof(filters))
+    return libc.prctl(_PR_SET_SECCOMP, _SECCOMP_MODE_FILTER, ctypes.create_string_buffer(fprog), 0, 0) == 0
+
+
+def apply_limits(cpu_limit: float, memory_kb: int = MEMORY_LIMIT_KB, limit_address_space: bool = True,
+                 output_limit_kb: int = OUTPUT_LIMIT_KB, writable: tuple = (), readonly: tuple = ()):
+    """
+    Puts the calling (freshly forked) process into the sandbox. Only the system
+    paths, `readonly` and `writable` stay visible.
+    cpu_limit=None skips the CPU rlimit for long-lived helpers such as the persistent JVM.
+    Capabilities are always dropped and the seccomp filter is required. Namespaces
+    the host doesn't support are skipped here and reported by check_isolation() at
+    startup; with LOCAL_SANDBOX_STRICT=1 they fail the run instead.
+    """
+    privileged = os.geteuid() == 0
+    os.setsid()
+    isolated = _enter_namespaces(privileged)
+    if isolated:
+        os.makedirs(_ROOT_MOUNT, exist_ok=True)
+        _isolate_filesystem(writable, readonly)
+    elif SANDBOX_STRICT:
+        raise OSError("filesystem isolation unavailable")
+    if cpu_limit is not None:
+        cpu = max(1, int(cpu_limit + 0.999))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    if limit_address_space:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_kb * 1024, memory_kb * 1024))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit_kb * 1024, output_limit_kb * 1024))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    _drop_capabilities(privileged)
+    if not _install_seccomp():
+        raise OSError("seccomp filter unavailable")
+
+
+_PROBE = r"""
+import os, json
+with open("/proc/self/status") as f:
+    status = dict(line.split(":", 1) for line in f)
+report = {
+    "uid": os.getuid(),
+    "sees_server": os.path.exists(%(server)r),
+    "seccomp": status["Seccomp"].strip() == "2",
+    "capabilities": int(status["CapEff"], 16),
+}
+# chroot into a subdirectory, walk up past it and chroot again: with a plain
+# chroot root and CAP_SYS_CHROOT this lands on the host filesystem.
+try:
+    os.mkdir("escape")
+    os.chroot("escape")
+    for _ in range(64):
+        os.chdir("..")
+    os.chroot(".")
+    report["escaped"] = os.path.exists(%(server)r)
+except OSError:
+    report["escaped"] = False
+print(json.dumps(report))
+"""
+
+
+def check_isolation() -> list:
+    """
+    Runs a probe through the sandbox and returns what it failed to enforce that
+    the host may legitimately lack (empty when fully isolated). Raises
+    RuntimeError when the sandbox is broken outright: the probe can't run, keeps
+    capabilities, has no seccomp filter or escapes its root. Called once at startup.
+    """
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    workdir = make_workdir("probe_")
+    try:
+        run = run_process([sys.executable, "-I", "-c", _PROBE % {"server": server_dir}], workdir, os.devnull, 5, 10)
+        report = json.loads(run["stdout"])
+    except Exception as e:
+        raise RuntimeError(f"sandbox probe failed: {e}") from e
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if report["escaped"]:
+        raise RuntimeError("sandboxed code escaped its root and reached the server's files")
+    if report["capabilities"]:
+        raise RuntimeError(f"sandboxed code keeps capabilities ({report['capabilities']:#x})")
+    if not report["seccomp"]:
+        raise RuntimeError("seccomp filter not installed")
+    problems = []
+    if report["sees_server"]:
+        problems.append("no private mount namespace; submissions can read server files")
+    if os.geteuid() != 0:
+        problems.append("server is not root; submissions run under the server's own uid")
+    elif report["uid"] == 0:
+        problems.append("submissions still run as root")
+    return problems
+
+
+def clean_env(cwd: str) -> dict:
+    """Environment for untrusted code: no API keys or other secrets from the server."""
+    return {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "HOME": cwd, "TMPDIR": cwd, "LANG": "C.UTF-8"}
+
+
+def open_output(path: str):
+    """
+    Opens a file a sandboxed child wrote in its working directory. The child owns
+    that directory and may have swapped the file for a symlink or a FIFO, so only
+    regular files are opened.
+    """
+    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK)
+    if not stat.S_ISREG(os.fstat(fd).st_mode):
+        os.close(fd)
+        raise OSError(f"{os.path.basename(path)} is not a regular file")
+    return os.fdopen(fd, "rb")
+
+
+def read_capped(path: str) -> str:
+    try:
+        with open_output(path) as f:
+            return f.read(OUTPUT_LIMIT_KB * 1024).decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def _peak_rss(pid: int):
+    """VmHWM of a running process in KB, or None once it has exited."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def wait_measured(pid: int, started: float, wall_limit: float) -> dict:
+    """
+    Waits for a sandboxed child and measures it with wait4, which reports the
+    CPU time of exactly this child. Peak memory is sampled from /proc while it
+    runs: the child's ru_maxrss also counts the forking worker's own footprint.
+    """
+    timed_out = False
+    peak = None
+    while True:
+        peak = max(filter(None, (peak, _peak_rss(pid))), default=None)
+        done, wait_status, usage = os.wait4(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() - started > wall_limit:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, wait_status, usage = os.wait4(pid, 0)
+            break
+        time.sleep(0.002)
+
+    return {
+        "exit_code": os.waitstatus_to_exitcode(wait_status),
+        "signal": os.WTERMSIG(wait_status) if os.WIFSIGNALED(wait_status) else None,
+        "timed_out": timed_out,
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "wall_time": time.monotonic() - started,
+        "memory": peak or usage.ru_maxrss,  # KB
+    }
+
+
+def run_process(cmd, cwd, stdin_path, cpu_limit, wall_limit, limit_address_space=True,
+                output_limit_kb=OUTPUT_LIMIT_KB, readonly=()):
+    """
+    Runs one sandboxed command with stdin from a file and stdout/stderr captured to files.
+    cwd is the only writable path it sees; `readonly` adds paths such as a header cache.
+    """
+    out_path = os.path.join(cwd, ".stdout")
+    err_path = os.path.join(cwd, ".stderr")
+    with open(stdin_path, "rb") as fin, open(out_path, "wb") as fout, open(err_path, "wb") as ferr:
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            cmd, cwd=cwd, stdin=fin, stdout=fout, stderr=ferr,
+            preexec_fn=lambda: apply_limits(cpu_limit, MEMORY_LIMIT_KB, limit_address_space, output_limit_kb,
+                                            writable=(cwd,), readonly=readonly),
+            env=clean_env(cwd),
+        )
+        run = wait_measured(proc.pid, started, wall_limit)
+        # Already reaped by wait4; stop Popen from waiting on the pid again.
+        proc.returncode = run["exit_code"]
+
+    run["stdout"] = read_capped(out_path)
+    run["stderr"] = read_capped(err_path)
+    return run
+
+
+def verdict(run: dict, cpu_limit: float) -> int:
+    """Judge0 status id for a finished run."""
+    if run["timed_out"] or run["cpu_time"] > cpu_limit or run["signal"] == signal.SIGXCPU:
+        return 5
+    if run["signal"] is not None:
+        return _SIGNAL_STATUS.get(run["signal"], 12)
+    if run["exit_code"] != 0:
+        return 11
+    return 3
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import importlib
+import threading
+from hidden_tests import HiddenTestStore
+
+# Stress inputs and expected outputs at any size, for problems whose entry has
+#
+#   "stress": {"generator": "two_sum", "seed": 0, "checker": {"delimiters": "[],"}}
+#
+# The generator module (see generators/) writes a seeded input of size N and
+# its reference solution writes the expected output; both go to temporary
+# files and then into the hidden test store, so a stress case is an ordinary
+# hidden test case ({"input_ref", "output_ref", "checker"}) that executors
+# stream from disk. The cache index maps (slug, N, seed, generator version) to
+# those references; editing a generator changes its version, so stale data is
+# never served. Cases are built on first request, or ahead of time with
+#
+#   python stress.py two-sum --sizes 1000,100000
+#
+# At most STRESS_CACHE_SIZE cases are kept. Past that the least recently used
+# are dropped along with the stored files they created (files that were already
+# in the store, e.g. a problem's own hidden tests, are left alone).
+
+STRESS_INDEX = os.getenv(
+    "STRESS_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stress_index.json")
+)
+MAX_STRESS_N = int(os.getenv("MAX_STRESS_N", "1000000"))
+STRESS_CACHE_SIZE = int(os.getenv("STRESS_CACHE_SIZE", "256"))
+
+
+def load_generator(name: str):
+    return importlib.import_module(f"generators.{name}")
+
+
+def generator_version(module) -> str:
+    with open(module.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class StressCache:
+    def __init__(self, store: HiddenTestStore = None, index_path: str = STRESS_INDEX):
+        self.store = store or HiddenTestStore()
+        self.index_path = index_path
+        self._index = None
+        self._lock = threading.Lock()
+        self._building = {}  # cache key -> Lock, so concurrent requests build a case once
+        self.stats = {"hits": 0, "builds": 0, "evictions": 0}
+
+    def _read_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _write_index(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        # Like the hidden test store's files, readable by the server only.
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def case(self, problem: dict, n: int, seed: int = None) -> dict:
+        """
+        The hidden test case for `problem` at size n:
+        {"input_ref", "output_ref", "checker", "n", "seed"}.
+        Raises LookupError if the problem has no generator, ValueError for a bad size.
+        """
+        spec = problem.get("stress")
+        if not spec:
+            raise LookupError(f"Problem '{problem.get('slug')}' has no stress generator")
+        if not 1 <= n <= MAX_STRESS_N:
+            raise ValueError(f"n must be between 1 and {MAX_STRESS_N}")
+        seed = spec.get("seed", 0) if seed is None else seed
+        try:
+            module = load_generator(spec["generator"])
+        except ImportError as e:
+            raise LookupError(f"Unknown stress generator '{spec['generator']}'") from e
+        rng_seed = f"{problem['slug']}:{n}:{seed}"
+        key = f"{rng_seed}:{generator_version(module)}"
+
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                refs = self._read_index().get(key)
+            if refs and refs["input_ref"] in self.store and refs["output_ref"] in self.store:
+                self.stats["hits"] += 1
+                with self._lock:
+                    # Recency lives in memory; it is written out with the next build.
+                    refs["last_used"] = time.time()
+            else:
+                refs = self._build(module, rng_seed, n)
+                with self._lock:
+                    self._read_index()[key] = refs
+                    self._evict()
+                    self._write_index()
+                self.stats["builds"] += 1
+        with self._lock:
+            self._building.pop(key, None)
+        return {"input_ref": refs["input_ref"], "output_ref": refs["output_ref"],
+                "checker": spec.get("checker") or {}, "n": n, "seed": seed}
+
+    def _evict(self):
+        """Drops least recently used cases past STRESS_CACHE_SIZE. Called with the lock held."""
+        index = self._read_index()
+        overflow = len(index) - STRESS_CACHE_SIZE
+        if overflow <= 0:
+            return
+        by_age = sorted(index, key=lambda key: index[key].get("last_used", 0))
+        evicted = [index.pop(key) for key in by_age[:overflow]]
+        in_use = {ref for refs in index.values() for ref in (refs["input_ref"], refs["output_ref"])}
+        for refs in evicted:
+            for ref in refs.get("created", ()):
+                if ref not in in_use:
+                    self.store.remove(ref)
+        self.stats["evictions"] += overflow
+
+    def _put(self, path: str, created: list) -> str:
+        """Stores a file, noting its reference in `created` if it wasn't in the store already."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        existed = digest.hexdigest() in self.store
+        ref = self.store.put(path)
+        if not existed:
+            created.append(ref)
+        return ref
+
+    def _build(self, module, rng_seed: str, n: int) -> dict:
+        with tempfile.TemporaryDirectory(prefix="stress_") as workdir:
+            input_path = os.path.join(workdir, "input.txt")
+            output_path = os.path.join(workdir, "output.txt")
+            with open(input_path, "w") as out:
+                module.generate(n, random.Random(rng_seed), out)
+            with open(input_path, "r") as inp, open(output_path, "w") as out:
+                module.solve(inp, out)
+            created = []
+            refs = {"input_ref": self._put(input_path, created), "output_ref": self._put(output_path, created)}
+            return {**refs, "created": created, "last_used": time.time()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-build stress test cases for a problem.")
+    parser.add_argument("slug")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--problems", default=os.path.join("data", "striver_sheet.json"))
+    args = parser.parse_args()
+
+    with open(args.problems, "r") as f:
+        problem = next((p for p in json.load(f) if p["slug"] == args.slug), None)
+    if problem is None:
+        print(f"Error: problem '{args.slug}' not found in {args.problems}.")
+        sys.exit(1)
+    cache = StressCache()
+    for size in args.sizes.split(","):
+        print(json.dumps(cache.case(problem, int(size), args.seed)))
+    print(cache.stats)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import unittest
+import warm_pool
+
+# Runs real Java through the persistent JVM runner. Needs a JDK (javac and
+# java on PATH); skipped otherwise.
+#
+#   python -m unittest test_jvm_runner
+
+
+@unittest.skipUnless(shutil.which("javac") and shutil.which("java"), "no JDK on PATH")
+class JvmRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = warm_pool.JvmRunner()
+
+    def tearDown(self):
+        self.runner.close()
+        shutil.rmtree(self.runner.home, ignore_errors=True)
+
+    def run_java(self, source: str, stdin: str = "", wall_limit: float = 10) -> dict:
+        workdir = self.runner.workdir()
+        with open(os.path.join(workdir, "Main.java"), "w") as f:
+            f.write(source)
+        stdin_path = os.path.join(workdir, ".stdin")
+        with open(stdin_path, "w") as f:
+            f.write(stdin)
+        ok, diagnostics = self.runner.compile(workdir, 30)
+        self.assertTrue(ok, diagnostics)
+        return self.runner.run(workdir, stdin_path, wall_limit)
+
+    def test_reads_stdin_and_writes_stdout(self):
+        run = self.run_java(
+            "import java.util.*;\n"
+            "public class Main { public static void main(String[] a) {"
+            " Scanner s = new Scanner(System.in); System.out.println(s.nextInt() + s.nextInt()); } }",
+            "2 3\n",
+        )
+        self.assertEqual(run["exit_code"], 0)
+        self.assertEqual(run["stdout"].strip(), "5")
+
+    def test_static_state_does_not_leak(self):
+        source = (
+            "public class Main { static int runs = 0; public static void main(String[] a) {"
+            " System.setProperty(\"seen\", \"yes\");"
+            " System.out.println(++runs + \" \" + System.getProperty(\"seen.before\", \"no\"));"
+            " System.setProperty(\"seen.before\", \"yes\"); } }"
+        )
+        first = self.run_java(source)
+        second = self.run_java(source)
+        self.assertEqual(first["stdout"].strip(), "1 no")
+        self.assertEqual(second["stdout"].strip(), "1 no")
+
+    def test_cpu_of_other_threads_is_counted(self):
+        run = self.run_java(
+            "public class Main { public static void main(String[] a) throws Exception {"
+            " Thread t = new Thread(() -> { long end = System.nanoTime() + 500_000_000L;"
+            " while (System.nanoTime() < end) { } }); t.start(); } }"
+        )
+        self.assertEqual(run["exit_code"], 0)
+        self.assertGreaterEqual(run["cpu_time"], 0.4)
+
+    def test_leftover_threads_replace_the_jvm(self):
+        self.run_java("public class Main { public static void main(String[] a) { System.out.println(1); } }")
+        pid = self.runner.proc.pid
+        self.run_java(
+            "public class Main { public static void main(String[] a) {"
+            " Thread t = new Thread(() -> { while (true) { try { Thread.sleep(1000); } catch (Exception e) { } } });"
+            " t.setDaemon(true); t.start(); } }"
+        )
+        self.assertIsNone(self.runner.proc)
+        run = self.run_java("public class Main { public static void main(String[] a) { System.out.println(2); } }")
+        self.assertEqual(run["stdout"].strip(), "2")
+        self.assertNotEqual(self.runner.proc.pid, pid)
+
+    def test_forged_reply_does_not_desync(self):
+        run = self.run_java(
+            "import java.io.*;\n"
+            "public class Main { public static void main(String[] a) {"
+            " PrintStream raw = new PrintStream(new FileOutputStream(FileDescriptor.out), true);"
+            " raw.println(\"0\\t0\\t0\\t0\"); raw.println(\"0\\t0\\t0\\t0\"); } }"
+        )
+        self.assertEqual(run["exit_code"], 1)
+        run = self.run_java("public class Main { public static void main(String[] a) { System.out.println(3); } }")
+        self.assertEqual(run["exit_code"], 0)
+        self.assertEqual(run["stdout"].strip(), "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
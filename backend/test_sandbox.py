@@ -0,0 +1,69 @@
+import os
+import sys
+import shutil
+import unittest
+from unittest import mock
+import sandbox
+
+# Runs real processes through the sandbox. Needs Linux with user or mount
+# namespaces (or root).
+#
+#   python -m unittest test_sandbox
+
+ESCAPE = r"""
+import os
+try:
+    os.mkdir("x")
+    os.chroot("x")
+    for _ in range(64):
+        os.chdir("..")
+    os.chroot(".")
+except OSError as e:
+    print("blocked", e.errno)
+print("escaped" if os.path.exists(%r) else "confined")
+""" % os.path.dirname(os.path.abspath(__file__))
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "Linux only")
+class SandboxTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = sandbox.make_workdir("test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def run_python(self, source: str) -> dict:
+        with open(os.path.join(self.workdir, "main.py"), "w") as f:
+            f.write(source)
+        return sandbox.run_process([sys.executable, "-I", "main.py"], self.workdir, os.devnull, 5, 10)
+
+    def test_check_isolation_passes(self):
+        sandbox.check_isolation()
+
+    def test_chroot_escape_is_blocked(self):
+        run = self.run_python(ESCAPE)
+        self.assertEqual(run["stdout"].split()[-1], "confined", run["stderr"])
+
+    def test_old_root_is_gone_without_capability_drop_or_seccomp(self):
+        # The forked child inherits these patches: only the pivoted root confines it.
+        with mock.patch.object(sandbox, "_drop_capabilities", lambda privileged: None), \
+                mock.patch.object(sandbox, "_install_seccomp", lambda: True):
+            run = self.run_python(ESCAPE)
+        self.assertEqual(run["stdout"].split()[-1], "confined", run["stderr"])
+
+    def test_no_capabilities_and_seccomp(self):
+        run = self.run_python(
+            "with open('/proc/self/status') as f:\n"
+            "    s = dict(l.split(':', 1) for l in f)\n"
+            "print(int(s['CapEff'], 16), int(s['CapBnd'], 16), s['Seccomp'].strip())\n"
+        )
+        self.assertEqual(run["stdout"].split(), ["0", "0", "2"], run["stderr"])
+
+    def test_network_syscalls_are_denied(self):
+        run = self.run_python("import socket\nsocket.socket()\n")
+        self.assertNotEqual(run["exit_code"], 0)
+        self.assertIn("PermissionError", run["stderr"])
+
+
+if __name__ == "__main__":
+    unittest.main()
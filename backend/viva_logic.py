@@ -1,48 +1,25 @@
-import os
+import asyncio
+import threading
 from dotenv import load_dotenv
-from database_manager import query_knowledge
+from database_manager import query_knowledge, lookup_viva_response, store_viva_response
+from llm_providers import AllProvidersFailed, StreamInterrupted, build_provider_chain
 
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if GROQ_API_KEY == "your_groq_api_key_here":
-    GROQ_API_KEY = None
+# Groq first (fast, free), Gemini as backup; both stream through one async chain
+# with per-provider timeouts and circuit breakers (see llm_providers.py). The
+# SDKs are imported and configured on first use, not at import time.
+_providers = None
+_providers_lock = threading.Lock()
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY and ("<" in GEMINI_API_KEY or "your_" in GEMINI_API_KEY):
-    GEMINI_API_KEY = None
 
-# ── Try Groq first (fast, free, works everywhere) ─────────────────────────────
-groq_client = None
-if GROQ_API_KEY:
-    try:
-        from groq import Groq
-        groq_client = Groq(api_key=GROQ_API_KEY)
-        print("[AI] Using Groq (Llama 3)")
-    except Exception as e:
-        print(f"[AI] Groq init failed: {e}")
-
-# ── Fallback: Gemini ──────────────────────────────────────────────────────────
-gemini_model = None
-if not groq_client and GEMINI_API_KEY:
-    try:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel(
-            'gemini-1.5-flash',
-            safety_settings=[
-                {"category": c, "threshold": "BLOCK_NONE"}
-                for c in [
-                    "HARM_CATEGORY_HARASSMENT",
-                    "HARM_CATEGORY_HATE_SPEECH",
-                    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "HARM_CATEGORY_DANGEROUS_CONTENT",
-                ]
-            ]
-        )
-        print("[AI] Using Gemini 1.5 Flash")
-    except Exception as e:
-        print(f"[AI] Gemini init failed: {e}")
+def get_providers():
+    global _providers
+    if _providers is None:
+        with _providers_lock:
+            if _providers is None:
+                _providers = build_provider_chain()
+    return _providers
 
 
 def _build_system_prompt(topic: str, expert_context: str) -> str:
@@ -81,13 +58,8 @@ def _parse_history(conversation_history: str) -> list:
     return messages
 
 
-def generate_viva_feedback(student_code: str, topic: str = "Binary Search", conversation_history: str = "") -> str:
-    """
-    RAG + LLM Loop:
-    1. Retrieve expert context from ChromaDB
-    2. Build system prompt with context
-    3. Send full conversation history + new message to LLM
-    """
+def _prepare_viva(student_code: str, topic: str, conversation_history: str):
+    """RETRIEVE + AUGMENT: returns (context, system_prompt, history_messages)."""
     print(f"\n--- Viva request: topic={topic}, input_len={len(student_code)} ---")
 
     # 1. RETRIEVE
@@ -104,40 +76,70 @@ def generate_viva_feedback(student_code: str, topic: str = "Binary Search", conv
 
     system_prompt = _build_system_prompt(topic, expert_context)
     history_messages = _parse_history(conversation_history)
+    return context, system_prompt, history_messages
+
+
+def _last_tutor_turn(history_messages: list) -> str:
+    for m in reversed(history_messages):
+        if m["role"] == "assistant":
+            return m["content"]
+    return ""
+
+
+async def stream_viva_feedback(student_code: str, topic: str = "Binary Search", conversation_history: str = "", info: dict = None):
+    """
+    Streaming variant of generate_viva_feedback: yields the tutor reply in chunks
+    as the provider produces them. A provider is only abandoned for the next one
+    if it fails before its first chunk; the offline fallback is a single chunk.
+    info, if given, gets info["cached"] set to whether the reply came from the
+    semantic response cache (which is then a single chunk as well).
+    """
+    info = info if info is not None else {}
+    info["cached"] = False
 
-    # 2. GENERATE via Groq
-    if groq_client:
-        try:
-            response = groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    *history_messages,
-                    {"role": "user", "content": student_code},
-                ],
-                max_tokens=300,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"[Groq Error] {e}")
-
-    # 3. GENERATE via Gemini fallback
-    if gemini_model:
-        try:
-            full_prompt = system_prompt + "\n\n"
-            for m in history_messages:
-                role = "Tutor" if m["role"] == "assistant" else "Student"
-                full_prompt += f"{role}: {m['content']}\n"
-            full_prompt += f"Student: {student_code}\nTutor:"
-            response = gemini_model.generate_content(full_prompt)
-            return response.text.strip()
-        except Exception as e:
-            print(f"[Gemini Error] {e}")
+    # Retrieval is a blocking Chroma call, keep it off the event loop.
+    context, system_prompt, history_messages = await asyncio.to_thread(
+        _prepare_viva, student_code, topic, conversation_history
+    )
+
+    # 2. Serve near-identical turns from the semantic cache
+    last_tutor_turn = _last_tutor_turn(history_messages)
+    cached = await asyncio.to_thread(lookup_viva_response, topic, student_code, last_tutor_turn)
+    if cached:
+        info["cached"] = True
+        yield cached
+        return
+
+    # 3. GENERATE via the provider chain (the first call imports the provider SDKs,
+    # or waits on the background warm-up doing so: off the event loop too)
+    providers = await asyncio.to_thread(get_providers)
+    chunks = []
+    try:
+        async for chunk in providers.stream(system_prompt, history_messages, student_code):
+            chunks.append(chunk)
+            yield chunk
+    except AllProvidersFailed:
+        pass
+    except StreamInterrupted:
+        return  # partial reply already sent; don't cache it
+    if chunks:
+        await asyncio.to_thread(store_viva_response, topic, student_code, last_tutor_turn, "".join(chunks).strip())
+        return
 
     # 4. No API available — smart offline fallback
     print("[OFFLINE MODE] No API available, using rule-based response.")
-    return _offline_response(student_code, topic, context, conversation_history)
+    yield _offline_response(student_code, topic, context, conversation_history)
+
+
+async def generate_viva_feedback(student_code: str, topic: str = "Binary Search", conversation_history: str = "", info: dict = None) -> str:
+    """
+    RAG + LLM Loop:
+    1. Retrieve expert context from ChromaDB
+    2. Build system prompt with context
+    3. Serve from the semantic cache, or send full conversation history + new message to LLM
+    """
+    chunks = [chunk async for chunk in stream_viva_feedback(student_code, topic, conversation_history, info)]
+    return "".join(chunks).strip()
 
 
 def _offline_response(student_code: str, topic: str, context, conversation_history: str) -> str:
@@ -206,16 +208,20 @@ def _offline_response(student_code: str, topic: str, context, conversation_histo
     )
 
 
-if __name__ == "__main__":
+async def _demo():
     print("=== Test: Initial code submission ===")
     code = "def binary_search(arr, t):\n  l,h=0,len(arr)-1\n  while l<=h:\n    m=(l+h)//2\n    if arr[m]==t: return m\n    elif arr[m]<t: l=m\n    else: h=m\n  return -1"
-    r1 = generate_viva_feedback(code, "Binary Search")
+    r1 = await generate_viva_feedback(code, "Binary Search")
     print("Tutor:", r1)
 
     print("\n=== Test: Off-topic greeting ===")
-    r2 = generate_viva_feedback("hiii", "Binary Search", f"Tutor: {r1}\nStudent: hiii")
+    r2 = await generate_viva_feedback("hiii", "Binary Search", f"Tutor: {r1}\nStudent: hiii")
     print("Tutor:", r2)
 
     print("\n=== Test: Student answer ===")
-    r3 = generate_viva_feedback("I think mid is correct", "Binary Search", f"Tutor: {r1}\nStudent: hiii\nTutor: {r2}\nStudent: I think mid is correct")
+    r3 = await generate_viva_feedback("I think mid is correct", "Binary Search", f"Tutor: {r1}\nStudent: hiii\nTutor: {r2}\nStudent: I think mid is correct")
     print("Tutor:", r3)
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
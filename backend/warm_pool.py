@@ -0,0 +1,451 @@
+import io
+import os
+import sys
+import json
+import time
+import select
+import shutil
+import hashlib
+import secrets
+import builtins
+import tempfile
+import traceback
+import subprocess
+from sandbox import OUTPUT_LIMIT_KB, apply_limits, clean_env, make_workdir, read_capped, wait_measured
+
+# Warm execution paths used inside LocalExecutor's worker processes:
+#   - Python: fork a small long-lived interpreter instead of starting python3.
+#   - Java:   one persistent JVM per worker compiles and runs submissions in fresh classloaders.
+#   - C++:    a precompiled <bits/stdc++.h> shared by every compile.
+
+WARM_DIR = os.getenv("LOCAL_WARM_DIR", os.path.join(tempfile.gettempdir(), "dsa_warm"))
+JVM_RECYCLE = int(os.getenv("LOCAL_JVM_RECYCLE", "50"))
+
+
+# --- Python: forked pre-warmed interpreter ---
+def _exec_main(source_code: str) -> int:
+    """Runs the submission as __main__ in this (forked) interpreter. Returns the exit code."""
+    try:
+        code = compile(source_code, "main.py", "exec")
+        exec(code, {"__name__": "__main__", "__file__": "main.py", "__builtins__": builtins})
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+def _forget_backend_modules():
+    """Drops everything not from the Python installation (backend modules) from sys.modules."""
+    prefixes = (sys.base_prefix, sys.prefix)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and not os.path.abspath(path).startswith(prefixes):
+            del sys.modules[name]
+
+
+def _fork_python(cwd: str, stdin_path: str, cpu_limit: float, wall_limit: float, output_limit_kb: int) -> dict:
+    """
+    Forks this (already started) interpreter and runs cwd/main.py in the child
+    under the same sandbox as a regular subprocess. Runs in the Python runner.
+    """
+    out_path = os.path.join(cwd, ".stdout")
+    err_path = os.path.join(cwd, ".stderr")
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            for fd, path, flags in ((0, stdin_path, os.O_RDONLY),
+                                    (1, out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+                                    (2, err_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)):
+                opened = os.open(path, flags, 0o600)
+                os.dup2(opened, fd)
+                os.close(opened)
+            # The runner's request/reply pipes must not be reachable from user code.
+            os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(clean_env(cwd))
+            apply_limits(cpu_limit, output_limit_kb=output_limit_kb, writable=(cwd,))
+            with open("main.py", encoding="utf-8") as f:
+                source_code = f.read()
+
+            sys.stdin = io.open(0, "r", encoding="utf-8", closefd=False)
+            sys.stdout = io.open(1, "w", encoding="utf-8", closefd=False)
+            sys.stderr = io.open(2, "w", encoding="utf-8", closefd=False)
+            sys.argv = ["main.py"]
+            # Same view of sys.path as `python -I main.py`: no backend modules.
+            sys.path = [cwd] + [p for p in sys.path if p and p.startswith((sys.base_prefix, sys.prefix))]
+            _forget_backend_modules()
+            exit_code = _exec_main(source_code)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(exit_code & 0xFF)
+
+    return wait_measured(pid, started, wall_limit)
+
+
+def _serve_python():
+    """Python runner main loop: one JSON request per line on stdin, one JSON reply per line on stdout."""
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            reply = _fork_python(**request)
+        except Exception as e:
+            reply = {"error": str(e)}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+def runner_env() -> dict:
+    """
+    Environment of the long-lived runners: executor settings (LOCAL_*) only.
+    Runs are forked from the Python runner and share its memory, so it must never
+    have held the server's environment (API keys) in the first place.
+    """
+    env = {name: value for name, value in os.environ.items() if name.startswith("LOCAL_")}
+    env.update(PATH=os.environ.get("PATH", "/usr/bin:/bin"), LANG="C.UTF-8")
+    return env
+
+
+class _PipeRunner:
+    """A helper process driven over its stdin/stdout, one line per request and reply."""
+
+    def __init__(self):
+        self.proc = None
+        self._buffer = b""
+
+    def _start(self, cmd: list, **popen_args):
+        self.close()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, **popen_args)
+        self._buffer = b""
+
+    def _exchange(self, line: str, timeout: float):
+        """Sends one line; returns the reply line, or None (and stops the helper) on timeout or death."""
+        self.proc.stdin.write((line + "\n").encode())
+        self.proc.stdin.flush()
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.close()
+                return None
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                self.close()
+                return None
+            self._buffer += chunk
+        reply, self._buffer = self._buffer.split(b"\n", 1)
+        return reply.decode(errors="replace")
+
+    def close(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait()
+            except OSError:
+                pass
+            self.proc = None
+
+
+class PythonRunner(_PipeRunner):
+    """
+    A long-lived interpreter, started with runner_env(), that forks a child per
+    Python run so runs skip interpreter start-up. Forking the pool worker instead
+    would hand user code a copy of the server's environment and heap.
+    """
+
+    def _ensure_started(self):
+        if self.proc is None or self.proc.poll() is not None:
+            self._start([sys.executable, "-E", "-s", os.path.abspath(__file__)], env=runner_env(), cwd="/")
+
+    def run(self, cwd: str, stdin_path: str, cpu_limit: float, wall_limit: float,
+            output_limit_kb: int = OUTPUT_LIMIT_KB) -> dict:
+        self._ensure_started()
+        request = {"cwd": cwd, "stdin_path": stdin_path, "cpu_limit": cpu_limit,
+                   "wall_limit": wall_limit, "output_limit_kb": output_limit_kb}
+        # The runner enforces the wall limit itself; the margin covers the fork and reply.
+        reply = self._exchange(json.dumps(request), wall_limit + 5)
+        if reply is None:
+            raise RuntimeError("Python runner did not reply")
+        run = json.loads(reply)
+        if "error" in run:
+            raise RuntimeError(f"Python runner: {run['error']}")
+        run["stdout"] = read_capped(os.path.join(cwd, ".stdout"))
+        run["stderr"] = read_capped(os.path.join(cwd, ".stderr"))
+        return run
+
+
+# --- C++: precompiled <bits/stdc++.h> ---
+def cpp_pch_dir(flags: list):
+    """
+    Returns an include dir holding bits/stdc++.h.gch built with `flags`, building it
+    on first use. g++ picks the .gch up when that dir is passed with -I before the
+    system headers and the flags match, otherwise it silently parses the header.
+    """
+    if not shutil.which("g++"):
+        return None
+    try:
+        version = subprocess.run(["g++", "-dumpfullversion"], capture_output=True, text=True).stdout.strip()
+        key = hashlib.sha256(" ".join([version] + flags).encode()).hexdigest()[:16]
+        pch_dir = os.path.join(WARM_DIR, f"pch-{key}")
+        if os.path.exists(os.path.join(pch_dir, "bits", "stdc++.h.gch")):
+            os.chmod(pch_dir, 0o755)  # compilers run as the sandbox uid
+            return pch_dir
+
+        probe = subprocess.run(
+            ["g++", *flags, "-x", "c++", "-E", "-H", "-", "-o", os.devnull],
+            input="#include <bits/stdc++.h>\n", capture_output=True, text=True,
+        )
+        header = probe.stderr.splitlines()[0].split(" ", 1)[1]
+
+        os.makedirs(WARM_DIR, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="pch-", dir=WARM_DIR)
+        os.makedirs(os.path.join(staging, "bits"))
+        subprocess.run(
+            ["g++", *flags, "-x", "c++-header", header, "-o", os.path.join(staging, "bits", "stdc++.h.gch")],
+            check=True, capture_output=True,
+        )
+        os.chmod(staging, 0o755)
+        try:
+            os.rename(staging, pch_dir)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # another worker won the race
+        return pch_dir
+    except Exception as e:
+        print(f"[Warm Pool] C++ precompiled header unavailable: {e}")
+        return None
+
+
+# --- Java: persistent JVM ---
+RUNNER_SOURCE = r"""
+import java.io.*;
+import java.lang.management.*;
+import java.lang.reflect.*;
+import java.net.*;
+import javax.tools.*;
+
+// Control protocol, one tab-separated line per request on stdin, each starting
+// with a nonce that the reply line repeats:
+//   <nonce> COMPILE <dir> <diagnostics file>            -> <nonce> <javac exit code>
+//   <nonce> RUN <class dir> <stdin> <stdout> <stderr>   -> <nonce> <exit code> <cpu ns> <peak heap KB> <tainted>
+// CPU is the whole process's (every submission thread, plus GC and JIT), as a
+// fresh JVM would be charged. Threads can't be killed in-process, so a run that
+// leaves any behind replies tainted=1 and the caller replaces this JVM.
+public class Runner {
+    public static void main(String[] args) throws Exception {
+        BufferedReader control = new BufferedReader(new InputStreamReader(System.in));
+        PrintStream reply = System.out;
+        String line;
+        while ((line = control.readLine()) != null) {
+            String[] f = line.split("\t");
+            String result;
+            try {
+                if (f[1].equals("COMPILE")) result = compile(f[2], f[3]);
+                else result = run(f[2], f[3], f[4], f[5]);
+            } catch (Throwable t) {
+                result = "-1\t0\t0\t1";
+            }
+            reply.println(f[0] + "\t" + result);
+            reply.flush();
+        }
+    }
+
+    static String compile(String dir, String diagnostics) throws Exception {
+        JavaCompiler javac = ToolProvider.getSystemJavaCompiler();
+        try (OutputStream log = new FileOutputStream(diagnostics)) {
+            return String.valueOf(javac.run(null, log, log, "-d", dir, dir + File.separator + "Main.java"));
+        }
+    }
+
+    static String run(String classDir, String stdin, String stdout, String stderr) throws Exception {
+        InputStream oldIn = System.in;
+        PrintStream oldOut = System.out, oldErr = System.err;
+        java.util.Properties properties = (java.util.Properties) System.getProperties().clone();
+        java.util.Locale locale = java.util.Locale.getDefault();
+        java.util.TimeZone zone = java.util.TimeZone.getDefault();
+        com.sun.management.OperatingSystemMXBean os =
+            (com.sun.management.OperatingSystemMXBean) ManagementFactory.getOperatingSystemMXBean();
+        ThreadGroup group = new ThreadGroup("submission");
+        int[] exit = {0};
+        try (URLClassLoader loader = new URLClassLoader(
+                 new URL[]{new File(classDir).toURI().toURL()}, ClassLoader.getPlatformClassLoader());
+             InputStream in = new BufferedInputStream(new FileInputStream(stdin));
+             PrintStream out = new PrintStream(new BufferedOutputStream(new FileOutputStream(stdout), 1 << 16), false);
+             PrintStream err = new PrintStream(new FileOutputStream(stderr), true)) {
+            System.setIn(in);
+            System.setOut(out);
+            System.setErr(err);
+            for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) pool.resetPeakUsage();
+
+            Method entry = loader.loadClass("Main").getMethod("main", String[].class);
+            long cpuBefore = os.getProcessCpuTime();
+            // Threads the submission starts join this group, so they can be found afterwards.
+            Thread main = new Thread(group, () -> {
+                try {
+                    entry.invoke(null, (Object) new String[0]);
+                } catch (InvocationTargetException e) {
+                    e.getCause().printStackTrace();
+                    exit[0] = 1;
+                } catch (Throwable e) {
+                    e.printStackTrace();
+                    exit[0] = 1;
+                }
+            }, "main", 64L << 20);
+            main.start();
+            main.join();
+            // Like a standalone JVM, the program ends when its last non-daemon thread does.
+            for (boolean waited = true; waited; ) {
+                waited = false;
+                for (Thread t : threadsOf(group)) {
+                    if (!t.isDaemon()) {
+                        t.join();
+                        waited = true;
+                    }
+                }
+            }
+            long cpu = os.getProcessCpuTime() - cpuBefore;
+            out.flush();
+
+            long peak = 0;
+            for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans())
+                if (pool.getType() == MemoryType.HEAP) peak += pool.getPeakUsage().getUsed();
+            int tainted = threadsOf(group).length > 0 ? 1 : 0;
+            return exit[0] + "\t" + cpu + "\t" + (peak / 1024) + "\t" + tainted;
+        } finally {
+            System.setIn(oldIn);
+            System.setOut(oldOut);
+            System.setErr(oldErr);
+            System.setProperties(properties);
+            java.util.Locale.setDefault(locale);
+            java.util.TimeZone.setDefault(zone);
+        }
+    }
+
+    static Thread[] threadsOf(ThreadGroup group) {
+        Thread[] found = new Thread[group.activeCount() + 16];
+        int n = group.enumerate(found, true);
+        Thread[] live = new Thread[n];
+        int alive = 0;
+        for (int i = 0; i < n; i++) if (found[i].isAlive()) live[alive++] = found[i];
+        return java.util.Arrays.copyOf(live, alive);
+    }
+}
+"""
+
+
+def _runner_dir():
+    """Compiles Runner.java once per machine; returns its class dir."""
+    key = hashlib.sha256(RUNNER_SOURCE.encode()).hexdigest()[:16]
+    runner_dir = os.path.join(WARM_DIR, f"jvm-runner-{key}")
+    if os.path.exists(os.path.join(runner_dir, "Runner.class")):
+        os.chmod(runner_dir, 0o755)  # the JVM runs as the sandbox uid
+        return runner_dir
+    os.makedirs(WARM_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix="jvm-runner-", dir=WARM_DIR)
+    with open(os.path.join(staging, "Runner.java"), "w") as f:
+        f.write(RUNNER_SOURCE)
+    subprocess.run(["javac", "Runner.java"], cwd=staging, check=True, capture_output=True)
+    os.chmod(staging, 0o755)
+    try:
+        os.rename(staging, runner_dir)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return runner_dir
+
+
+class JvmRunner(_PipeRunner):
+    """
+    A long-lived JVM that compiles (javax.tools) and runs submissions, each in its
+    own URLClassLoader so static state never leaks between runs; system
+    properties, default locale and time zone are restored after each run. The
+    JVM is replaced after `recycle_after` runs, on timeout, if user code kills
+    it, if a run leaves threads behind or if anything but the expected reply
+    shows up on its stdout.
+    Its only writable path is `home`; submissions it handles must be placed in
+    workdirs made there (see workdir()).
+    """
+
+    def __init__(self, recycle_after: int = JVM_RECYCLE):
+        super().__init__()
+        self.recycle_after = recycle_after
+        self.runs = 0
+        self.home = make_workdir("jvm_")
+
+    def workdir(self) -> str:
+        """A fresh working directory the JVM can see."""
+        return make_workdir("run_", self.home)
+
+    def _ensure_started(self):
+        if self.proc is not None and self.proc.poll() is None and self.runs < self.recycle_after:
+            return
+        runner_dir = _runner_dir()
+        self._start(
+            ["java", "-Xmx256m", "-XX:+UseSerialGC", "-cp", runner_dir, "Runner"],
+            preexec_fn=lambda: apply_limits(None, limit_address_space=False, writable=(self.home,),
+                                            readonly=(runner_dir,)),
+            env=clean_env(self.home), cwd=self.home,
+        )
+        self.runs = 0
+
+    def _request(self, fields: list, timeout: float):
+        """Sends one command; returns the reply fields, or None on timeout / JVM death."""
+        self._ensure_started()
+        # User code shares the JVM's stdout. Replies carry a fresh nonce, so text it
+        # writes there can't pass for a reply; anything else replaces the JVM.
+        nonce = secrets.token_hex(16)
+        reply = self._exchange("\t".join([nonce] + fields), timeout)
+        if reply is None:
+            return None
+        nonce_field, _, rest = reply.partition("\t")
+        if nonce_field != nonce:
+            self.close()
+            return None
+        return rest.split("\t")
+
+    def compile(self, workdir: str, timeout: float):
+        """Returns (ok, diagnostics); ok is None if javac didn't finish in time."""
+        log = os.path.join(workdir, ".compile")
+        reply = self._request(["COMPILE", workdir, log], timeout)
+        output = read_capped(log)
+        if reply is None:
+            return None, output or "Compilation timed out"
+        return reply[0] == "0", output
+
+    def run(self, workdir: str, stdin_path: str, wall_limit: float) -> dict:
+        out_path = os.path.join(workdir, ".stdout")
+        err_path = os.path.join(workdir, ".stderr")
+        started = time.monotonic()
+        reply = self._request(["RUN", workdir, stdin_path, out_path, err_path], wall_limit)
+        wall_time = time.monotonic() - started
+        self.runs += 1
+        run = {
+            "signal": None,
+            "timed_out": False,
+            "wall_time": wall_time,
+            "stdout": read_capped(out_path),
+            "stderr": read_capped(err_path),
+        }
+        if reply is None:
+            # Either the wall limit expired or user code called System.exit / crashed the JVM.
+            timed_out = wall_time >= wall_limit
+            run.update(exit_code=None if timed_out else 1, timed_out=timed_out, cpu_time=wall_time, memory=None)
+        else:
+            run.update(exit_code=int(reply[0]), cpu_time=int(reply[1]) / 1e9, memory=int(reply[2]))
+            if reply[3] != "0":
+                self.close()  # threads left running would share the next submission's JVM
+        return run
+
+
+if __name__ == "__main__":
+    _serve_python()
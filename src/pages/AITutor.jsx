@@ -145,21 +145,44 @@ const AITutor = () => {
             conversation_history: conversationHistory,
          };
 
-         const res = await fetch(`${API_BASE_URL}/viva`, {
+         const res = await fetch(`${API_BASE_URL}/viva/stream`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload),
          });
 
-         if (!res.ok) throw new Error(`Server error: ${res.status}`);
+         if (!res.ok || !res.body) throw new Error(`Server error: ${res.status}`);
 
-         const data = await res.json();
-         const aiMsg = {
-            role: 'ai',
-            content: data.question || "I couldn't generate a response. Please try again.",
-            time: now(),
+         // Show the reply as it streams in: append tokens to a placeholder message
+         setMessages((prev) => [...prev, { role: 'ai', content: '', time: now() }]);
+         setIsTyping(false);
+
+         const appendToReply = (text) => {
+            setMessages((prev) => {
+               const last = prev[prev.length - 1];
+               return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+            });
          };
-         setMessages((prev) => [...prev, aiMsg]);
+
+         const reader = res.body.getReader();
+         const decoder = new TextDecoder();
+         let buffer = '';
+         let received = false;
+         while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const evt of events) {
+               const dataLine = evt.split('\n').find((l) => l.startsWith('data: '));
+               if (evt.startsWith('event: token') && dataLine) {
+                  received = true;
+                  appendToReply(JSON.parse(dataLine.slice(6)).text);
+               }
+            }
+         }
+         if (!received) appendToReply("I couldn't generate a response. Please try again.");
       } catch (err) {
          setMessages((prev) => [
             ...prev,
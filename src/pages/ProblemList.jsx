@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import {
     CheckCircleIcon,
@@ -7,29 +7,87 @@ import {
     DocumentTextIcon,
     HashtagIcon,
     BookOpenIcon,
+    MagnifyingGlassIcon,
     VideoCameraIcon
 } from '@heroicons/react/24/outline';
 
 import API_BASE_URL from '../config';
 
+const PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 250;
+
 export default function ProblemList() {
     const [problems, setProblems] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [query, setQuery] = useState('');
+    const [searchResults, setSearchResults] = useState(null); // items for the latest search
+    const sentinel = useRef(null);
     const navigate = useNavigate();
+    const searching = query.trim() !== '';
 
-    useEffect(() => {
-        fetch(`${API_BASE_URL}/problems`)
+    // The list is paginated: fetch the first page, then the next one only when
+    // the user scrolls to the end (or clicks "Load more").
+    const loadPage = useCallback((cursor) => {
+        const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+        if (cursor) params.set('cursor', cursor);
+        return fetch(`${API_BASE_URL}/problems?${params}`)
             .then(res => res.json())
-            .then(data => {
-                setProblems(data);
-                setLoading(false);
-            })
-            .catch(err => {
-                console.error("Failed to load problems:", err);
-                setLoading(false);
+            .then(page => {
+                setProblems(prev => cursor ? [...prev, ...page.items] : page.items);
+                setNextCursor(page.next_cursor);
             });
     }, []);
 
+    useEffect(() => {
+        loadPage(null)
+            .catch(err => console.error("Failed to load problems:", err))
+            .finally(() => setLoading(false));
+    }, [loadPage]);
+
+    const loadMore = useCallback(() => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        loadPage(nextCursor)
+            .catch(err => console.error("Failed to load problems:", err))
+            .finally(() => setLoadingMore(false));
+    }, [nextCursor, loadingMore, loadPage]);
+
+    // Re-attached whenever the sentinel (re)appears: after the first load, after
+    // each page (new cursor) and when a search is cleared.
+    useEffect(() => {
+        if (loading || searching || !sentinel.current) return;
+        const observer = new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) loadMore();
+        }, { rootMargin: '400px' });
+        observer.observe(sentinel.current);
+        return () => observer.disconnect();
+    }, [loadMore, loading, searching]);
+
+    // Filtering runs on the server (/problems/search), so it covers problems
+    // that haven't been paged in yet.
+    useEffect(() => {
+        const q = query.trim();
+        if (!q) return;
+        const controller = new AbortController();
+        const timer = setTimeout(() => {
+            const params = new URLSearchParams({ q, limit: '100' });
+            fetch(`${API_BASE_URL}/problems/search?${params}`, { signal: controller.signal })
+                .then(res => res.json())
+                .then(results => setSearchResults(results.items))
+                .catch(err => {
+                    if (err.name !== 'AbortError') console.error("Search failed:", err);
+                });
+        }, SEARCH_DEBOUNCE_MS);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [query]);
+
+    const visible = searching && searchResults ? searchResults : problems;
+
     if (loading) return (
         <div className="p-8 bg-black min-h-screen text-white flex items-center justify-center">
             <div className="animate-pulse flex flex-col items-center">
@@ -46,6 +104,16 @@ export default function ProblemList() {
                     SDE Sheet
                 </h1>
                 <p className="text-gray-400 mt-2">Master DSA with AI-powered feedback & reports.</p>
+                <div className="relative mt-6 max-w-md">
+                    <MagnifyingGlassIcon className="w-4 h-4 text-gray-500 absolute left-3 top-1/2 -translate-y-1/2" />
+                    <input
+                        type="search"
+                        value={query}
+                        onChange={(e) => setQuery(e.target.value)}
+                        placeholder="Search problems..."
+                        className="w-full bg-[#111] border border-[#222] rounded-lg pl-9 pr-3 py-2 text-sm text-white placeholder-gray-500 focus:outline-none focus:border-orange-500/50"
+                    />
+                </div>
             </header>
 
             {/* List Header */}
@@ -59,7 +127,7 @@ export default function ProblemList() {
             </div>
 
             <div className="space-y-2">
-                {problems.map(problem => (
+                {visible.map(problem => (
                     <div
                         key={problem.id}
                         onClick={() => navigate(`/dashboard/workspace/${problem.slug}`)}
@@ -73,7 +141,7 @@ export default function ProblemList() {
                             <div className="flex items-center gap-3 text-xs text-gray-400">
                                 <span className="flex items-center gap-1">
                                     <ClockIcon className="w-3 h-3" />
-                                    {problem.complexity.split(',')[0]}
+                                    {(problem.complexity || '').split(',')[0]}
                                 </span>
                                 <span className="hidden sm:flex items-center gap-1">
                                     <HashtagIcon className="w-3 h-3" />
@@ -133,7 +201,22 @@ export default function ProblemList() {
                         </div>
                     </div>
                 ))}
+                {searching && searchResults && searchResults.length === 0 && (
+                    <div className="text-center text-gray-500 py-8">No problems match "{query.trim()}".</div>
+                )}
             </div>
+
+            {!searching && nextCursor && (
+                <div ref={sentinel} className="flex justify-center mt-6">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 text-sm text-gray-400 hover:text-white border border-[#222] hover:border-gray-700 rounded-lg transition-colors disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 }